@@ -3,7 +3,8 @@
 import uuid
 from django.db import models
 from django.conf import settings
-from scanner.models import ScanResult
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from scanner.models import LIST_DEFERRED_FIELDS, ScanResult
 from dashboard.models import FirmProfile
 
 class RiskImpact(models.TextChoices):
@@ -36,6 +37,29 @@ class ChecklistTemplate(models.Model):
     def __str__(self):
         return f"[{self.standard}] {self.code}"
 
+class ChecklistSubmissionQuerySet(models.QuerySet):
+    def for_firm(self, firm):
+        return self.filter(firm=firm)
+
+    def listing(self):
+        """
+        Lightweight rows for list pages: the scan joined without its encrypted
+        columns, and the compliance score's weights summed in the same query.
+        """
+        weight = F('responses__template__weight')
+        return self.select_related('scan').defer(
+            *(f"scan__{name}" for name in LIST_DEFERRED_FIELDS)
+        ).annotate(
+            score_total=Sum(weight),
+            score_earned=Sum(Case(
+                When(responses__status='yes', then=weight),
+                When(responses__status='partial', then=weight * 0.5),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )),
+        )
+
+
 class ChecklistSubmission(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
@@ -55,6 +79,8 @@ class ChecklistSubmission(models.Model):
     completed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     is_locked = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ChecklistSubmissionQuerySet.as_manager()
     
     class Meta:
         # IMPORTANT: This ensures a scan cannot have TWO submissions 
@@ -73,6 +99,12 @@ class ChecklistSubmission(models.Model):
         """
         Formula: (Sum of earned weights / Total possible weights) * 100
         """
+        if hasattr(self, 'score_total'):
+            # Weights already summed by ChecklistSubmissionQuerySet.listing()
+            if not self.score_total:
+                return 0
+            return round((self.score_earned / self.score_total) * 100, 0)
+
         responses = self.responses.select_related('template').all()
         if not responses.exists():
             return 0
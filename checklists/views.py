@@ -302,9 +302,7 @@ def generate_checklist_pdf(request, pk):
 
 def submission_list(request):
     """ Overview of all audits within the firm. """
-    submissions = ChecklistSubmission.objects.filter(
-        firm=request.user.firm
-    ).select_related('scan').order_by('-created_at')
+    submissions = ChecklistSubmission.objects.for_firm(request.user.firm).listing().order_by('-created_at')
     
     return render(request, 'checklists/submission_list.html', {'submissions': submissions})
 
@@ -0,0 +1,137 @@
+# core/fields.py
+"""
+Model fields shared across apps.
+
+LazyEncryptedTextField stores exactly what EncryptedTextField stores (a Fernet
+token of the text), but doesn't decrypt model instances on fetch. When a
+LazyDecryptQuerySet loads instances, the token stays sealed and is decrypted
+the first time the attribute is read. A list page that never reads
+`scan._raw_data` never pays for decrypting it. A sealed value that is saved
+back unread is written as the same token, without a decrypt and re-encrypt
+round trip. Every other read (values(), values_list(), other models' querysets)
+decrypts on fetch like EncryptedTextField, and a value that doesn't decrypt is
+returned as stored.
+
+CompressedEncryptedTextField zlib-compresses the text before encrypting it,
+for the large JSON and log columns. Its values are stored as
+"z1:<Fernet token of the compressed bytes>"; the prefix versions the format
+and tells them apart from plain EncryptedTextField tokens, which it still reads.
+Rows written before the switch are rewritten in batches by the
+scanner.tasks.compress_scan_blobs task.
+"""
+
+import contextvars
+import zlib
+
+import cryptography.fernet
+from django.db import models
+from django.db.models.query import ModelIterable
+from django.db.models.query_utils import DeferredAttribute
+from encrypted_model_fields.fields import CRYPTER, EncryptedMixin, EncryptedTextField, decrypt_str
+
+COMPRESSED_PREFIX = "z1:"
+
+# Set only while a LazyModelIterable builds its next instance
+_loading_instances = contextvars.ContextVar("lazy_decrypt_loading", default=False)
+
+
+class Sealed:
+    """A value as fetched from the database, still encrypted."""
+
+    __slots__ = ("token",)
+
+    def __init__(self, token):
+        self.token = token
+
+    def __repr__(self):
+        return "<Sealed>"
+
+
+class LazyModelIterable(ModelIterable):
+    """Yields model instances whose lazy encrypted fields stay sealed until read."""
+
+    def __iter__(self):
+        rows = super().__iter__()
+        while True:
+            # Only around the fetch, so queries made by the caller between rows decrypt as usual
+            token = _loading_instances.set(True)
+            try:
+                obj = next(rows)
+            except StopIteration:
+                return
+            finally:
+                _loading_instances.reset(token)
+            yield obj
+
+
+class LazyDecryptQuerySet(models.QuerySet):
+    """QuerySet for models with LazyEncryptedTextFields: instances load with those fields sealed."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._iterable_class = LazyModelIterable
+
+
+class _UnsealingAttribute(DeferredAttribute):
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, Sealed):
+            value = instance.__dict__[self.field.attname] = self.field.unseal(value)
+        return value
+
+    def __set__(self, instance, value):
+        # A data descriptor, so reads go through __get__ even once the value is in __dict__
+        instance.__dict__[self.field.attname] = value
+
+
+class LazyEncryptedTextField(EncryptedTextField):
+    descriptor_class = _UnsealingAttribute
+
+    def from_db_value(self, value, *args, **kwargs):
+        if not value:
+            return value
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        if _loading_instances.get():
+            return Sealed(value)
+        return self.unseal(Sealed(value))
+
+    def unseal(self, sealed):
+        try:
+            return decrypt_str(sealed.token)
+        except cryptography.fernet.InvalidToken:
+            return sealed.token  # plaintext written before the column was encrypted
+
+    def pre_save(self, model_instance, add):
+        # Skips the descriptor, so an unread value stays sealed
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
+    def get_db_prep_save(self, value, connection):
+        if isinstance(value, Sealed):
+            return value.token
+        return super().get_db_prep_save(value, connection)
+
+
+class CompressedEncryptedTextField(LazyEncryptedTextField):
+    def unseal(self, sealed):
+        if sealed.token.startswith(COMPRESSED_PREFIX):
+            token = sealed.token[len(COMPRESSED_PREFIX):].encode("utf-8")
+            try:
+                return zlib.decompress(CRYPTER.decrypt(token)).decode("utf-8")
+            except (cryptography.fernet.InvalidToken, zlib.error, UnicodeDecodeError):
+                return sealed.token  # as EncryptedTextField does with a value it can't decrypt
+        return super().unseal(sealed)
+
+    def get_db_prep_save(self, value, connection):
+        if isinstance(value, Sealed):
+            return value.token
+        # TextField's preparation, without EncryptedMixin's plain encryption
+        value = super(EncryptedMixin, self).get_db_prep_save(value, connection)
+        if value is None:
+            return value
+        token = CRYPTER.encrypt(zlib.compress(str(value).encode("utf-8"), 6))
+        return COMPRESSED_PREFIX + token.decode("utf-8")
@@ -0,0 +1,53 @@
+# core/keywords.py
+"""
+Multi-pattern keyword matching.
+
+A KeywordMatcher compiles every keyword of every rule into one regex and finds
+all of them in a single pass over a text, returning the hits grouped by rule
+id. Matches are plain substring matches, exactly like `keyword in text`:
+overlapping keywords ("data subject" inside "data subject access") are all
+reported. Callers pass lowercase text and lowercase keywords.
+"""
+
+import re
+
+
+class KeywordMatcher:
+    def __init__(self, rules: dict):
+        """`rules`: {rule_id: [keyword, ...]}"""
+        self.rules = {rule: list(keywords) for rule, keywords in rules.items()}
+
+        self._rules_for = {}  # keyword -> rule ids
+        for rule, keywords in self.rules.items():
+            for kw in keywords:
+                self._rules_for.setdefault(kw, set()).add(rule)
+
+        # Longest first, so at each position the regex captures the longest keyword;
+        # the shorter keywords starting at the same position are its prefixes.
+        keywords = sorted(self._rules_for, key=len, reverse=True)
+        self._prefixes = {
+            kw: [p for p in keywords if p != kw and kw.startswith(p)]
+            for kw in keywords
+        }
+        # Zero-width lookahead so matches may overlap
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))") if keywords else None
+
+    def keywords_in(self, text: str) -> set:
+        """Every keyword that occurs in `text`."""
+        found = set()
+        if not text or self._pattern is None:
+            return found
+        for m in self._pattern.finditer(text):
+            kw = m.group(1)
+            if kw not in found:
+                found.add(kw)
+                found.update(self._prefixes[kw])
+        return found
+
+    def scan(self, text: str) -> dict:
+        """{rule_id: {matched keywords}} for every rule with at least one hit."""
+        hits = {}
+        for kw in self.keywords_in(text):
+            for rule in self._rules_for[kw]:
+                hits.setdefault(rule, set()).add(kw)
+        return hits
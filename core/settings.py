@@ -256,6 +256,12 @@ else:
             #"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         }
     }
+# Conditional-GET page cache (scanner/scanner_tasks/http_cache.py), kept apart so it can be capped or moved
+CACHES["scanner_http"] = {
+    **CACHES["default"],
+    "LOCATION": os.getenv('SCANNER_HTTP_CACHE_URL', f"{REDIS_URL}/2"),
+    "KEY_PREFIX": "scanner_http",
+}
 
 
 # ========================= CELERY =========================
@@ -267,6 +273,88 @@ CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', f"{REDIS_URL}/0")
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+CELERY_BEAT_SCHEDULE = {
+    # Resume scans whose worker died (expired lease)
+    'reap-expired-scans': {
+        'task': 'scanner.tasks.reap_expired_scans',
+        'schedule': float(os.getenv('SCANNER_REAPER_INTERVAL', 60)),
+    },
+}
+
+
+# ========================= SCANNER =========================
+# "threads" (default) or "asyncio" — how checks inside one scan run concurrently
+SCANNER_EXECUTOR = os.getenv('SCANNER_EXECUTOR', 'threads')
+SCANNER_MAX_WORKERS = int(os.getenv('SCANNER_MAX_WORKERS', 8))
+# Separate pool for subprocess / network-scan checks (nikto, nmap)
+SCANNER_HEAVY_WORKERS = int(os.getenv('SCANNER_HEAVY_WORKERS', 2))
+# Per-check deadline in seconds for registry Checks that don't declare their own;
+# a check that overruns is reported as an error
+SCANNER_CHECK_TIMEOUT = int(os.getenv('SCANNER_CHECK_TIMEOUT', 60))
+# Live progress pushes per second per scan (Redis + WebSocket); the DB only sees milestones
+SCANNER_PROGRESS_MAX_RATE = float(os.getenv('SCANNER_PROGRESS_MAX_RATE', 2))
+# How often a running scan polls its Redis cancel flag (seconds)
+SCANNER_CANCEL_POLL_INTERVAL = float(os.getenv('SCANNER_CANCEL_POLL_INTERVAL', 1.0))
+# Celery queue for nikto/nmap (served by the `heavy` worker in the Procfile); empty = run them inline
+SCANNER_HEAVY_QUEUE = os.getenv('SCANNER_HEAVY_QUEUE', 'heavy')
+# Resumable scans: workers renew a RUNNING scan's lease every HEARTBEAT seconds while executing checks;
+# scans waiting on queued tasks hold the longer QUEUED lease. Expired leases are resumed from checkpoints
+SCANNER_LEASE_TTL = int(os.getenv('SCANNER_LEASE_TTL', 120))
+SCANNER_LEASE_HEARTBEAT = int(os.getenv('SCANNER_LEASE_HEARTBEAT', 30))
+SCANNER_LEASE_QUEUED_TTL = int(os.getenv('SCANNER_LEASE_QUEUED_TTL', 3600))
+SCANNER_MAX_RESUMES = int(os.getenv('SCANNER_MAX_RESUMES', 3))  # then the scan is marked FAILED
+# A heavy check still queued after this long is treated as lost and requeued (counts as a resume)
+SCANNER_HEAVY_QUEUE_MAX_WAIT = int(os.getenv('SCANNER_HEAVY_QUEUE_MAX_WAIT', 4 * 3600))
+# Per-check results for a domain are reused by scans started within this many seconds (0 = never)
+SCANNER_RESULT_REUSE_WINDOW = int(os.getenv('SCANNER_RESULT_REUSE_WINDOW', 3600))
+# Scans rewritten per compress_scan_blobs task (compress-then-encrypt of _raw_data / scan_log)
+SCANNER_COMPRESS_BATCH = int(os.getenv('SCANNER_COMPRESS_BATCH', 200))
+# Seconds a completed scan's report build waits, collapsing repeated completions into one build
+REPORT_BUILD_DEBOUNCE = int(os.getenv('REPORT_BUILD_DEBOUNCE', 5))
+# Bulk portfolio scans: max scans of all batches running at once
+SCANNER_BATCH_CONCURRENCY = int(os.getenv('SCANNER_BATCH_CONCURRENCY', 20))
+SCANNER_BATCH_MAX_DOMAINS = int(os.getenv('SCANNER_BATCH_MAX_DOMAINS', 5000))
+# Sharded scans: split the fast checks of these tiers over N parallel subtasks (0 or 1 = off)
+SCANNER_SHARDS = int(os.getenv('SCANNER_SHARDS', 0))
+SCANNER_SHARD_TIERS = os.getenv('SCANNER_SHARD_TIERS', 'enterprise').split(',')
+
+# Pooled keep-alive HTTP sessions used by every check (one session per target host)
+SCANNER_HTTP_TIMEOUT = int(os.getenv('SCANNER_HTTP_TIMEOUT', 10))
+SCANNER_HTTP_VERIFY = os.getenv('SCANNER_HTTP_VERIFY', 'True') == 'True'
+SCANNER_HTTP_POOL_SIZE = int(os.getenv('SCANNER_HTTP_POOL_SIZE', 10))
+SCANNER_HTTP_RETRIES = int(os.getenv('SCANNER_HTTP_RETRIES', 2))
+SCANNER_HTTP_BACKOFF = float(os.getenv('SCANNER_HTTP_BACKOFF', 0.5))
+SCANNER_HTTP_MAX_HOSTS = int(os.getenv('SCANNER_HTTP_MAX_HOSTS', 256))
+# Response bodies are streamed and cut at this many (decompressed) bytes; results note when a page was truncated
+SCANNER_HTTP_MAX_BODY = int(os.getenv('SCANNER_HTTP_MAX_BODY', 2_000_000))
+# DNS stage: targets are resolved once per TTL (clamped to MIN/MAX) and shared across workers through the cache
+SCANNER_DNS_CACHE = os.getenv('SCANNER_DNS_CACHE', 'True') == 'True'  # False = connections use the system resolver
+SCANNER_DNS_TIMEOUT = float(os.getenv('SCANNER_DNS_TIMEOUT', 5))
+SCANNER_DNS_MIN_TTL = int(os.getenv('SCANNER_DNS_MIN_TTL', 30))
+SCANNER_DNS_MAX_TTL = int(os.getenv('SCANNER_DNS_MAX_TTL', 3600))
+SCANNER_DNS_NEGATIVE_TTL = int(os.getenv('SCANNER_DNS_NEGATIVE_TTL', 60))  # how long "does not exist" is remembered
+SCANNER_DNS_MAX_HOSTS = int(os.getenv('SCANNER_DNS_MAX_HOSTS', 1024))
+# Requests per second per target host, shared by all workers through Redis (0 = unlimited).
+# 429/503 responses halve a target's rate for the strike window and block it for Retry-After (or backoff)
+SCANNER_RATE_LIMIT = float(os.getenv('SCANNER_RATE_LIMIT', 5))
+SCANNER_RATE_LIMIT_BURST = int(os.getenv('SCANNER_RATE_LIMIT_BURST', 10))
+SCANNER_RATE_LIMIT_BY_IP = os.getenv('SCANNER_RATE_LIMIT_BY_IP', 'False') == 'True'  # also throttle per resolved IP
+SCANNER_RATE_LIMIT_BACKOFF = float(os.getenv('SCANNER_RATE_LIMIT_BACKOFF', 1.0))
+SCANNER_RATE_LIMIT_MAX_BACKOFF = int(os.getenv('SCANNER_RATE_LIMIT_MAX_BACKOFF', 120))
+SCANNER_RATE_LIMIT_STRIKE_WINDOW = int(os.getenv('SCANNER_RATE_LIMIT_STRIKE_WINDOW', 300))
+SCANNER_RATE_LIMIT_REDIS_URL = os.getenv('SCANNER_RATE_LIMIT_REDIS_URL', f"{REDIS_URL}/1")
+# The homepage and policy pages with ETag/Last-Modified are revalidated across scans; unchanged pages skip download and parsing
+SCANNER_HTTP_CACHE_TTL = int(os.getenv('SCANNER_HTTP_CACHE_TTL', 60 * 60 * 24))  # 0 = off
+SCANNER_HTTP_CACHE_ALIAS = os.getenv('SCANNER_HTTP_CACHE_ALIAS', 'scanner_http')
+SCANNER_HTTP_CACHE_MAX_ENTRY = int(os.getenv('SCANNER_HTTP_CACHE_MAX_ENTRY', 256_000))  # bytes; larger pages aren't kept
+# Site crawl shared by the sitemap, forms and third-party script checks; stops at the first budget hit
+SCANNER_CRAWL_MAX_PAGES = int(os.getenv('SCANNER_CRAWL_MAX_PAGES', 50))
+SCANNER_CRAWL_MAX_BYTES = int(os.getenv('SCANNER_CRAWL_MAX_BYTES', 5_000_000))
+SCANNER_CRAWL_MAX_DEPTH = int(os.getenv('SCANNER_CRAWL_MAX_DEPTH', 2))
+SCANNER_CRAWL_CONCURRENCY = int(os.getenv('SCANNER_CRAWL_CONCURRENCY', 4))
+SCANNER_CRAWL_DELAY = float(os.getenv('SCANNER_CRAWL_DELAY', 0.2))  # seconds between requests to one host
+SCANNER_CRAWL_TIME_BUDGET = int(os.getenv('SCANNER_CRAWL_TIME_BUDGET', 45))  # seconds
+
 
 
 # ========================= DEFAULT AUTO FIELD =========================
@@ -13,6 +13,55 @@ from weasyprint import HTML
 from django.conf import settings
 from django.utils.html import strip_tags
 
+from core.keywords import KeywordMatcher
+from scanner.models import LIST_DEFERRED_FIELDS
+
+# Simple keyword -> GDPR article mapping. Extend as needed.
+GDPR_ARTICLE_MAP = {
+    "lawful basis": ["Article 6"],
+    "consent": ["Article 6", "Article 7"],
+    "data subject": ["Article 12", "Article 15"],
+    "access": ["Article 15"],
+    "portability": ["Article 20"],
+    "erasure": ["Article 17"],
+    "right to be forgotten": ["Article 17"],
+    "security": ["Article 32"],
+    "breach": ["Article 33", "Article 34"],
+    "processor": ["Article 28"],
+    "processor agreement": ["Article 28"],
+    "data protection": ["Article 24", "Article 32"],
+    "privacy policy": ["Article 12", "Article 13"],
+    "cookie": ["Article 7", "Recital 30"],
+    "tracking": ["Article 6", "Recital 30"],
+    "consent banner": ["Article 7"],
+    "child": ["Article 8"],
+    "minimisation": ["Article 5"],
+    "retention": ["Article 5"],
+    "encryption": ["Article 32"],
+    "mfa": ["Article 32"],
+    "incident response": ["Article 33"],
+    "dsar": ["Article 15", "Article 12"],
+    "data subject access": ["Article 15"],
+}
+
+# One pass over a finding title yields both the article keywords and GDPR relevance
+REPORT_KEYWORDS = KeywordMatcher({
+    "gdpr_article": list(GDPR_ARTICLE_MAP),
+    "gdpr_related": ['gdpr', 'consent', 'erasure', 'data subject', 'dsar', 'right to be forgotten', 'data protection'],
+})
+
+
+class ComplianceReportQuerySet(models.QuerySet):
+    def for_firm(self, firm):
+        return self.filter(scan__firm=firm)
+
+    def listing(self):
+        """Lightweight rows for list pages: the scan is joined, encrypted columns on both sides deferred."""
+        return self.select_related("scan").defer(
+            "_findings", *(f"scan__{name}" for name in LIST_DEFERRED_FIELDS)
+        )
+
+
 class ComplianceReport(models.Model):
     """
     One-to-one encrypted compliance report generated after a ScanResult completes.
@@ -30,6 +79,11 @@ class ComplianceReport(models.Model):
     # PDF file stored in MEDIA_ROOT/reports/pdfs/
     pdf_file = models.FileField(upload_to='reports/pdfs/', null=True, blank=True)
 
+    # Fingerprint of the scan data the PDF was rendered from (reports.tasks.build_compliance_report)
+    input_fingerprint = models.CharField(max_length=64, blank=True, default="")
+
+    objects = ComplianceReportQuerySet.as_manager()
+
     class Meta:
         ordering = ['-generated_at']
         verbose_name = "Compliance Report"
@@ -66,43 +120,13 @@ class ComplianceReport(models.Model):
         if findings is None:
             findings = self.findings
 
-        # Simple keyword -> GDPR article mapping. Extend as needed.
-        gdpr_map = {
-            "lawful basis": ["Article 6"],
-            "consent": ["Article 6", "Article 7"],
-            "data subject": ["Article 12", "Article 15"],
-            "access": ["Article 15"],
-            "portability": ["Article 20"],
-            "erasure": ["Article 17"],
-            "right to be forgotten": ["Article 17"],
-            "security": ["Article 32"],
-            "breach": ["Article 33", "Article 34"],
-            "processor": ["Article 28"],
-            "processor agreement": ["Article 28"],
-            "data protection": ["Article 24", "Article 32"],
-            "privacy policy": ["Article 12", "Article 13"],
-            "cookie": ["Article 7", "Recital 30"],
-            "tracking": ["Article 6", "Recital 30"],
-            "consent banner": ["Article 7"],
-            "child": ["Article 8"],
-            "minimisation": ["Article 5"],
-            "retention": ["Article 5"],
-            "encryption": ["Article 32"],
-            "mfa": ["Article 32"],
-            "incident response": ["Article 33"],
-            "dsar": ["Article 15", "Article 12"],
-            "data subject access": ["Article 15"],
-        }
-
         # Normalize and map
         updated = []
         for f in findings:
             title = (f.get('title') or f.get('description') or "").lower()
             gdpr_articles = set()
-            for kw, arts in gdpr_map.items():
-                if kw in title:
-                    for a in arts:
-                        gdpr_articles.add(a)
+            for kw in REPORT_KEYWORDS.scan(title).get("gdpr_article", ()):
+                gdpr_articles.update(GDPR_ARTICLE_MAP[kw])
             if not gdpr_articles:
                 # fallback: category based mapping
                 cat = (f.get('category') or "").lower()
@@ -149,7 +173,7 @@ class ComplianceReport(models.Model):
                 gdpr_related = True
             # Also check title/description for gdpr keywords
             t = (f.get('title') or f.get('description') or "").lower()
-            if any(k in t for k in ['gdpr', 'consent', 'erasure', 'data subject', 'dsar', 'right to be forgotten', 'data protection']):
+            if "gdpr_related" in REPORT_KEYWORDS.scan(t):
                 gdpr_related = True
 
             multiplier = 1.25 if gdpr_related else 1.0
@@ -340,39 +364,6 @@ class ComplianceReport(models.Model):
         filename = f"report_{self.pk}_{self.scan.domain}.pdf"
         self.pdf_file.save(filename, ContentFile(pdf_bytes), save=True)
 
-# ---------------------------------------------------------------------- #
-# SIGNAL: Auto-create ComplianceReport when ScanResult is complete
-# ---------------------------------------------------------------------- #
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-
-@receiver(post_save, sender="scanner.ScanResult")
-def create_compliance_report(sender, instance, created, **kwargs):
-    """
-    Runs whenever a ScanResult is saved.
-    If its status becomes 'complete', generate a compliance report and PDF.
-    """
-    #if instance.status != "complete":
-    if instance.status not in ["COMPLETED", "complete"]:
-        return
-
-    # Local import → prevents circular import
-    from reports.models import ComplianceReport
-
-    report, created_report = ComplianceReport.objects.get_or_create(scan=instance)
-
-    # Copy findings from ScanResult.raw_data
-    if created_report or not report.findings:
-        findings = instance.raw_data.get('findings', [])
-        report.findings = findings
-        report.save(update_fields=['_findings'])
-
-    # Generate PDF only if missing or outdated (you may change this logic if you prefer)
-    # Always refresh computed fields before saving PDF
-    report.generate_pdf()
-
-
-
 
 class VerifiedReport(models.Model):
     report_id = models.CharField(max_length=16, unique=True)  # c054b193
@@ -1,9 +1,13 @@
 # reports/tasks.py
 #reports\tasks.py
 
+import hashlib
+import json
 import os
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.template.loader import render_to_string
 from django.utils import timezone
 from weasyprint import HTML
@@ -11,6 +15,85 @@ from weasyprint import HTML
 from scanner.models import ScanResult # FIXED
 from checklists.services import ScoringService
 from checklists.models import ChecklistSubmission
+from .models import ComplianceReport
+
+# Bump when reports/pdf_template.html or the report computations change, so unchanged scans re-render
+REPORT_FINGERPRINT_VERSION = 1
+
+
+def _build_key(scan_id):
+    return f"report_build:{scan_id}"
+
+
+def _release_build(scan_id):
+    try:
+        cache.delete(_build_key(scan_id))
+    except Exception as e:
+        print(f"Report queue error: {e}")
+
+
+def queue_report_build(scan_id):
+    """
+    Enqueue the compliance report build of a scan that just completed.
+    Calls for the same scan within the debounce window collapse into one build.
+    """
+    debounce = getattr(settings, "REPORT_BUILD_DEBOUNCE", 5)
+    try:
+        if not cache.add(_build_key(scan_id), 1, timeout=debounce + 600):
+            return False
+    except Exception as e:
+        # No dedup without the cache; the fingerprint still keeps the build idempotent
+        print(f"Report queue error: {e}")
+    try:
+        build_compliance_report.apply_async(args=[scan_id], countdown=debounce)
+    except Exception as e:
+        print(f"Report queue error: {e}")
+        _release_build(scan_id)
+        return False
+    return True
+
+
+def report_fingerprint(scan, findings) -> str:
+    """Hash of everything the report PDF is rendered from (besides the render time)."""
+    inputs = {
+        "version": REPORT_FINGERPRINT_VERSION,
+        "findings": findings,
+        "recommendations": scan.raw_data.get("recommendations", []),
+        "domain": scan.domain,
+        "grade": scan.grade,
+        "risk_score": scan.risk_score,
+        "scan_date": scan.scan_date,
+        "completed_at": scan.completed_at,
+        "firm": scan.firm.firm_name,
+    }
+    encoded = json.dumps(inputs, cls=DjangoJSONEncoder, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@shared_task
+def build_compliance_report(scan_id):
+    """
+    Create or refresh the ComplianceReport of a completed scan and render its
+    PDF. Skips rendering when the report's PDF was already built from the same
+    inputs, so repeated or duplicate builds are cheap.
+    """
+    _release_build(scan_id)  # a later completion may queue a new build
+
+    scan = ScanResult.objects.select_related("firm").filter(pk=scan_id).first()
+    if scan is None or scan.status != "COMPLETED":
+        return "Skipped"
+
+    report, _ = ComplianceReport.objects.get_or_create(scan=scan)
+    findings = scan.get_findings()
+    fingerprint = report_fingerprint(scan, findings)
+    if (report.input_fingerprint == fingerprint and report.pdf_file
+            and report.pdf_file.storage.exists(report.pdf_file.name)):
+        return "Unchanged"
+
+    report.findings = findings
+    report.input_fingerprint = fingerprint
+    report.generate_pdf(request=None)  # saves the report with its new PDF
+    return "Built"
 
 @shared_task(name="generate_unified_report")
 def generate_unified_report(scan_id):
@@ -34,7 +34,7 @@ class ReportListView(FirmRequiredMixin, ListView):
 
     def get_queryset(self):
         # request.user.firm is guaranteed to exist by the Mixin
-        return ComplianceReport.objects.filter(scan__firm=self.request.user.firm).order_by('-generated_at')
+        return ComplianceReport.objects.for_firm(self.request.user.firm).listing().order_by('-generated_at')
         
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1,4 +1,74 @@
 # scanner/admin.py
+from datetime import timedelta
+
 from django.contrib import admin
+from django.shortcuts import render
+from django.urls import path
+from django.utils import timezone
+
+from .models import ScanFinding, ScanResult
+from .scanner_tasks.timing import latency_distribution
+
+# Latency report window: most recent completed scans within this many days
+LATENCY_DAYS = 7
+LATENCY_MAX_SCANS = 1000
+
+
+@admin.register(ScanResult)
+class ScanResultAdmin(admin.ModelAdmin):
+    list_display = ('scan_id', 'domain', 'firm', 'status', 'grade', 'scan_date', 'slowest_check')
+    list_filter = ('status', 'grade', 'scan_date')
+    search_fields = ('domain', 'scan_id')
+    fields = ('scan_id', 'firm', 'domain', 'status', 'grade', 'risk_score', 'scan_date', 'completed_at',
+              'resume_count', 'check_metrics')
+    readonly_fields = fields
+    change_list_template = 'admin/scanner/scanresult/change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def slowest_check(self, obj):
+        timed = [(m["wall_ms"], name) for name, m in (obj.check_metrics or {}).items() if "wall_ms" in m]
+        if not timed:
+            return "—"
+        wall_ms, name = max(timed)
+        return f"{name} ({wall_ms / 1000:.1f}s)"
+    slowest_check.short_description = 'Slowest Check'
+
+    def get_urls(self):
+        return [
+            path('latency/', self.admin_site.admin_view(self.latency_view), name='scanner_scanresult_latency'),
+        ] + super().get_urls()
+
+    def latency_view(self, request):
+        try:
+            days = max(1, int(request.GET.get('days', LATENCY_DAYS)))
+        except ValueError:
+            days = LATENCY_DAYS
+        rows = (ScanResult.objects
+                .filter(status='COMPLETED', completed_at__gte=timezone.now() - timedelta(days=days))
+                .exclude(check_metrics={})
+                .order_by('-completed_at')
+                .values_list('check_metrics', flat=True)[:LATENCY_MAX_SCANS])
+        rows = list(rows)
+        return render(request, 'admin/scanner/check_latency.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Check latency',
+            'days': days,
+            'scan_count': len(rows),
+            'report': latency_distribution(rows),
+        })
+
+
+@admin.register(ScanFinding)
+class ScanFindingAdmin(admin.ModelAdmin):
+    list_display = ('domain', 'firm', 'standard', 'title', 'status', 'risk_level', 'found_at', 'is_current')
+    list_filter = ('is_current', 'status', 'risk_level', 'module', 'standard')
+    search_fields = ('domain', 'title', 'check_name')
+    list_select_related = ('firm',)
+    readonly_fields = ('scan', 'firm', 'domain', 'check_name', 'module', 'standard', 'title', 'status',
+                       'risk_level', 'details', 'found_at', 'is_current')
 
-# Register your models here.
+    def has_add_permission(self, request):
+        return False
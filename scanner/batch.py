@@ -0,0 +1,198 @@
+# scanner/batch.py
+"""
+Bulk portfolio scans.
+
+start_batch() validates a list of domains, creates one PENDING ScanResult per
+domain with a single bulk_create, and hands them to fill_batch_slots().
+Only as many scans as there are free slots in a global pool of
+SCANNER_BATCH_CONCURRENCY leases are queued; each holds its slot until it is
+finalized, heavy checks and shards included, and the finalizer then queues
+the oldest pending scan of any batch. A batch of thousands of domains thus
+drains steadily, in order, without flooding the workers' queue.
+
+Aggregated batch progress (counts per status) is pushed to the
+`batch_<batch_id>` channel group whenever a scan in the batch finishes.
+"""
+
+import csv
+import re
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import ScanResult
+from .result_cache import normalize_domain
+
+DOMAIN_RE = re.compile(r'^[a-z0-9-]+(\.[a-z0-9-]+)*\.[a-z]{2,}$')
+
+SLOT_TTL = 60 * 60 * 2  # seconds; a crashed scan gives its slot back after this
+TERMINAL_STATUSES = ("COMPLETED", "FAILED", "CANCELLED")
+
+
+def parse_domains(lines) -> tuple:
+    """
+    Domains from an iterable of lines: one per line, comma separated, or CSV
+    (the first column, or the "domain" column if there is a header).
+    Returns (valid unique domains in input order, invalid entries).
+    """
+    rows = list(csv.reader(lines))
+    column = 0
+    if rows and "domain" in [c.strip().lower() for c in rows[0]]:
+        column = [c.strip().lower() for c in rows[0]].index("domain")
+        rows = rows[1:]
+        values = [r[column] for r in rows if len(r) > column]
+    else:
+        values = [c for r in rows for c in r]
+
+    domains, invalid, seen = [], [], set()
+    for value in values:
+        if not value.strip():
+            continue
+        domain = normalize_domain(value)
+        if not DOMAIN_RE.match(domain):
+            invalid.append(value.strip())
+        elif domain not in seen:
+            seen.add(domain)
+            domains.append(domain)
+    return domains, invalid
+
+
+def start_batch(firm, domains, user=None) -> str:
+    """Create the scans for `domains` and start as many as there are free slots; returns the batch id."""
+    batch_id = str(uuid.uuid4())[:8]
+    ScanResult.objects.bulk_create([
+        ScanResult(
+            firm=firm,
+            user=user,
+            domain=domain,
+            status='PENDING',
+            # Full-length ids: one collision among thousands of rows would fail the whole insert
+            scan_id=uuid.uuid4().hex,
+            batch_id=batch_id,
+        )
+        for domain in domains
+    ], batch_size=500)
+    fill_batch_slots()
+    publish_batch_progress(batch_id)
+    return batch_id
+
+
+# ---------------------------------------------------------------- #
+# Global concurrency cap
+# ---------------------------------------------------------------- #
+def _slot_key(i):
+    return f"scan_batch_slot:{i}"
+
+
+def _held_key(scan_pk):
+    return f"scan_batch_held:{scan_pk}"
+
+
+def _concurrency():
+    return getattr(settings, "SCANNER_BATCH_CONCURRENCY", 20)
+
+
+def acquire_slot(scan_pk):
+    """
+    Lease one of SCANNER_BATCH_CONCURRENCY slots for a scan. Returns True on
+    success, False if all are taken, and None if the scan already holds one
+    (another dispatcher got to it first).
+    """
+    # Claim the scan before taking a slot so two dispatchers never both start it
+    if not cache.add(_held_key(scan_pk), "claimed", timeout=SLOT_TTL):
+        return None
+    for i in range(_concurrency()):
+        if cache.add(_slot_key(i), scan_pk, timeout=SLOT_TTL):
+            cache.set(_held_key(scan_pk), i, timeout=SLOT_TTL)
+            return True
+    cache.delete(_held_key(scan_pk))
+    return False
+
+
+def release_slot(scan_pk):
+    """Give back the slot held by a scan; a no-op if it holds none."""
+    try:
+        slot = cache.get(_held_key(scan_pk))
+        if slot is None:
+            return
+        if slot != "claimed" and cache.get(_slot_key(slot)) == scan_pk:
+            cache.delete(_slot_key(slot))
+        cache.delete(_held_key(scan_pk))
+    except Exception as e:
+        print(f"Batch slot error: {e}")
+
+
+def fill_batch_slots() -> int:
+    """
+    Queue the oldest pending batch scans, across all batches, until every slot
+    is taken. Called when a batch starts, when a batch scan frees its slot,
+    and by the reaper (slots whose holder crashed expire after SLOT_TTL).
+    Returns the number of scans queued.
+    """
+    from .tasks import run_batch_scan
+
+    # Pending scans already holding a slot are at most one per slot, so twice
+    # the pool size always reaches every scan that can start now
+    pending = (ScanResult.objects.filter(batch_id__isnull=False, status='PENDING')
+               .order_by('pk')
+               .values_list('pk', flat=True)[:2 * _concurrency()])
+    started = 0
+    try:
+        for pk in pending:
+            acquired = acquire_slot(pk)
+            if acquired is None:
+                continue
+            if not acquired:
+                break
+            run_batch_scan.delay(pk)
+            started += 1
+    except Exception as e:
+        # The scans stay PENDING; the reaper's next pass dispatches them
+        print(f"Batch slot error: {e}")
+    return started
+
+
+def batch_scan_finished(scan):
+    """Called by every scan finalizer: free the scan's slot, start the next pending one, publish progress."""
+    if scan.batch_id:
+        release_slot(scan.pk)
+        fill_batch_slots()
+        publish_batch_progress(scan.batch_id)
+
+
+# ---------------------------------------------------------------- #
+# Progress
+# ---------------------------------------------------------------- #
+def batch_progress(batch_id) -> dict:
+    """Counts per status for a batch, from one aggregate query."""
+    counts = dict(
+        ScanResult.objects.filter(batch_id=batch_id)
+        .values_list("status").annotate(n=Count("pk")).order_by()
+    )
+    total = sum(counts.values())
+    done = sum(counts.get(s, 0) for s in TERMINAL_STATUSES)
+    return {
+        "batch_id": batch_id,
+        "total": total,
+        "done": done,
+        "pending": counts.get("PENDING", 0),
+        "running": counts.get("RUNNING", 0),
+        "completed": counts.get("COMPLETED", 0),
+        "failed": counts.get("FAILED", 0),
+        "cancelled": counts.get("CANCELLED", 0),
+        "progress": int(done * 100 / total) if total else 100,
+    }
+
+
+def publish_batch_progress(batch_id):
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            f"batch_{batch_id}",
+            {"type": "batch_update", **batch_progress(batch_id)},
+        )
+    except Exception as e:
+        print(f"WS Batch Error: {e}")
@@ -0,0 +1,61 @@
+# scanner/cancellation.py
+"""
+Cross-process scan cancellation.
+
+CancelScanView sets a flag in the cache (Redis). The worker running the scan
+polls that flag from a watcher thread and trips the scan's in-process
+CancelToken, which stops new checks, aborts HTTP work between requests and
+kills running nikto/nmap subprocesses.
+"""
+
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .scanner_tasks.cancel import CancelToken
+
+CANCEL_TTL = 60 * 60 * 6  # seconds
+
+
+def _cache_key(scan_id):
+    return f"scan_cancel:{scan_id}"
+
+
+def request_cancel(scan_id):
+    try:
+        cache.set(_cache_key(scan_id), True, timeout=CANCEL_TTL)
+    except Exception as e:
+        print(f"Cancel flag error: {e}")
+
+
+def is_cancel_requested(scan_id) -> bool:
+    try:
+        return bool(cache.get(_cache_key(scan_id)))
+    except Exception:
+        return False
+
+
+class CancelWatcher:
+    """Polls the cancel flag for one scan and trips `token` when it is set."""
+
+    def __init__(self, scan_id, token: CancelToken | None = None, interval=None):
+        self.scan_id = scan_id
+        self.token = token or CancelToken()
+        self.interval = interval or getattr(settings, "SCANNER_CANCEL_POLL_INTERVAL", 1.0)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="scan-cancel-watch", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if is_cancel_requested(self.scan_id):
+                self.token.cancel()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self.token
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        return False
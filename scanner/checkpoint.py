@@ -0,0 +1,109 @@
+# scanner/checkpoint.py
+"""
+Resumable scans: per-check checkpoints and a lease on running scans.
+
+Every check result is checkpointed in the cache (Redis) the moment it
+finishes, one key per check, so concurrent shards never overwrite each other.
+While a worker is executing checks for a scan, a LeaseKeeper thread pushes the
+row's lease_expires_at forward every SCANNER_LEASE_HEARTBEAT seconds. When a
+scan only waits on queued work, it holds a longer SCANNER_LEASE_QUEUED_TTL lease.
+
+If the worker dies (OOM, deploy), nothing renews the lease. The
+reap_expired_scans beat task then hands the scan to resume_scan, which merges
+the checkpoints and runs only the checks that never finished. Heavy checks are
+tracked by their Celery task id: one still waiting in the queue keeps its
+place, and only a task that failed, died while running or has been queued
+longer than SCANNER_HEAVY_QUEUE_MAX_WAIT is sent again.
+"""
+
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+CHECKPOINT_TTL = 60 * 60 * 24  # seconds
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _key(scan_id, name):
+    return f"scan_ckpt:{scan_id}:{name}"
+
+
+def save_checkpoint(scan_id, name, result):
+    if result.get("status") == "cancelled":
+        return
+    try:
+        cache.set(_key(scan_id, name), result, timeout=CHECKPOINT_TTL)
+    except Exception as e:
+        print(f"Checkpoint error: {e}")
+
+
+def load_checkpoints(scan_id, names) -> dict:
+    """{check name: result} for the checks of `names` that finished."""
+    keys = {_key(scan_id, name): name for name in names}
+    try:
+        found = cache.get_many(list(keys))
+    except Exception as e:
+        print(f"Checkpoint error: {e}")
+        return {}
+    return {keys[k]: result for k, result in found.items()}
+
+
+def clear_checkpoints(scan_id, names):
+    try:
+        cache.delete_many([_key(scan_id, name) for name in names])
+    except Exception as e:
+        print(f"Checkpoint error: {e}")
+
+
+def lease_deadline(queued=False):
+    """Lease expiry for a scan being worked on now, or one waiting on queued tasks."""
+    if queued:
+        return timezone.now() + timedelta(seconds=_setting("SCANNER_LEASE_QUEUED_TTL", 3600))
+    return timezone.now() + timedelta(seconds=_setting("SCANNER_LEASE_TTL", 120))
+
+
+def renew_lease(scan_pk):
+    """Extend the lease (never shortens a longer queued lease)."""
+    from .models import ScanResult
+
+    deadline = lease_deadline()
+    ScanResult.objects.filter(
+        Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=deadline), pk=scan_pk, status='RUNNING'
+    ).update(lease_expires_at=deadline)
+
+
+class LeaseKeeper:
+    """Heartbeat thread that keeps a running scan's lease alive while checks execute."""
+
+    def __init__(self, scan_pk, interval=None):
+        self.scan_pk = scan_pk
+        self.interval = interval or _setting("SCANNER_LEASE_HEARTBEAT", 30)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="scan-lease", daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    renew_lease(self.scan_pk)
+                except Exception as e:
+                    print(f"Lease heartbeat error: {e}")
+        finally:
+            connection.close()  # this thread's own DB connection
+
+    def __enter__(self):
+        renew_lease(self.scan_pk)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        return False
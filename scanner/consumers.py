@@ -3,6 +3,8 @@ import json
 from channels.generic.websocket import WebsocketConsumer
 from asgiref.sync import async_to_sync
 
+from .models import ScanResult
+
 class ScanProgressConsumer(WebsocketConsumer):
     def connect(self):
         self.scan_id = self.scope["url_route"]["kwargs"]["scan_id"]
@@ -31,7 +33,8 @@ class ScanProgressConsumer(WebsocketConsumer):
             "step": event.get("step"),
             "grade": event.get("grade"),
             "risk_score": event.get("risk_score"),
-            "status": event.get("status")
+            "status": event.get("status"),
+            "vulnerabilities": event.get("vulnerabilities")
         }))
 
     
@@ -76,7 +79,8 @@ class ScanProgressConsumer(WebsocketConsumer):
             "step": event.get("step"),
             "grade": event.get("grade"),
             "risk_score": event.get("risk_score"),
-            "status": event.get("status")
+            "status": event.get("status"),
+            "vulnerabilities": event.get("vulnerabilities")
         }))
 
     def scan_complete_trigger(self, event):
@@ -115,3 +119,43 @@ class NotificationConsumer(WebsocketConsumer):
             "risk_score": event["risk_score"],
             "scan_id": event["scan_id"]
         }))
+
+
+class BatchProgressConsumer(WebsocketConsumer):
+    def connect(self):
+        user = self.scope["user"]
+        if user.is_anonymous:
+            self.close()
+            return
+        self.batch_id = self.scope["url_route"]["kwargs"]["batch_id"]
+        # Only the firm that started the batch may follow it
+        if not ScanResult.objects.filter(batch_id=self.batch_id, firm_id=user.firm_id).exists():
+            self.close()
+            return
+        self.room_group_name = f"batch_{self.batch_id}"
+        async_to_sync(self.channel_layer.group_add)(
+            self.room_group_name,
+            self.channel_name
+        )
+        self.accept()
+
+    def disconnect(self, close_code):
+        if hasattr(self, "room_group_name"):
+            async_to_sync(self.channel_layer.group_discard)(
+                self.room_group_name,
+                self.channel_name
+            )
+
+    def batch_update(self, event):
+        self.send(text_data=json.dumps({
+            "type": "batch",
+            "batch_id": event.get("batch_id"),
+            "total": event.get("total"),
+            "done": event.get("done"),
+            "completed": event.get("completed"),
+            "failed": event.get("failed"),
+            "cancelled": event.get("cancelled"),
+            "running": event.get("running"),
+            "pending": event.get("pending"),
+            "progress": event.get("progress")
+        }))
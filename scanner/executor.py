@@ -0,0 +1,214 @@
+# scanner/executor.py
+"""
+Pluggable executors that run scan checks concurrently.
+
+Every check is a blocking `func(domain) -> dict` that spends almost all of its
+time waiting on the network, so checks are run side by side and the scan takes
+roughly as long as its slowest check. The backend is chosen per deployment via
+settings.SCANNER_EXECUTOR ("threads" or "asyncio").
+
+Checks are registry.Check specs. They are started in registry.plan() order
+(cheap cost classes first), each gets its own deadline (Check.timeout), and
+heavy subprocess/network-scan checks run on a separate, smaller pool so they
+never starve the fast HTTP checks.
+
+If the scan's CancelToken trips, checks that have not started are skipped and
+`run()` returns within a poll interval with the unfinished checks marked
+"cancelled"; threads still busy are abandoned and stop at their next request.
+
+Completions are handed back to the calling thread (the Celery task), so the
+`on_result` callback can safely touch the ORM and the channel layer. Each check
+runs in a copy of the caller's context, so scan-scoped state kept in
+contextvars (e.g. the shared fetch cache) is visible to every check.
+"""
+
+import asyncio
+import contextvars
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .registry import plan
+from .scanner_tasks.cancel import ScanCancelled, current_token, raise_if_cancelled
+from .scanner_tasks.timing import measure
+
+
+def _timeout_result(test_name, timeout):
+    return {"title": test_name, "status": "error", "details": f"Timed out after {timeout}s"}
+
+
+def _cancelled_result(test_name):
+    return {"title": test_name, "status": "cancelled", "details": "Scan cancelled"}
+
+
+def _call_check(test_name, test_func, domain):
+    try:
+        raise_if_cancelled()
+        with measure(test_name) as timing:
+            result = test_func(domain)
+        # A check that swallowed a network failure reports it as fail/warn; don't let it be reused
+        if timing is not None and timing.failures and isinstance(result, dict):
+            result = {**result, "transient": True}
+        return result
+    except ScanCancelled:
+        return _cancelled_result(test_name)
+    except Exception as e:
+        return {"title": test_name, "status": "error", "details": str(e)}
+
+
+class CheckExecutor:
+    """
+    Base executor. Subclasses start the checks and push
+    (index, result) tuples onto `done` as each one finishes.
+    """
+
+    def __init__(self, max_workers=None, heavy_workers=None, timeout=None):
+        self.max_workers = max_workers or getattr(settings, "SCANNER_MAX_WORKERS", 8)
+        self.heavy_workers = heavy_workers or getattr(settings, "SCANNER_HEAVY_WORKERS", 2)
+        self.timeout = timeout or getattr(settings, "SCANNER_CHECK_TIMEOUT", 60)
+
+    def _timeout_for(self, check):
+        return check.timeout or self.timeout
+
+    def _start(self, domain, checks, order, done):
+        raise NotImplementedError
+
+    def run(self, domain, checks, on_result=None):
+        """
+        Run `checks` (registry.Check list) against `domain`.
+        Calls on_result(index, name, result) in completion order and
+        returns the results in the original order.
+        """
+        results = [None] * len(checks)
+        if not checks:
+            return results
+
+        token = current_token()
+        done = queue.Queue()
+        self._start(domain, checks, plan(checks), done)
+
+        remaining = len(checks)
+        while remaining:
+            try:
+                idx, result = done.get(timeout=0.5)
+            except queue.Empty:
+                if token is not None and token.cancelled:
+                    break
+                continue
+            remaining -= 1
+            results[idx] = result
+            if on_result:
+                on_result(idx, checks[idx].name, result)
+
+        return [r if r is not None else _cancelled_result(checks[i].name) for i, r in enumerate(results)]
+
+
+class ThreadPoolCheckExecutor(CheckExecutor):
+    """Runs each check on a worker thread and enforces the deadlines from a watchdog."""
+
+    def _start(self, domain, checks, order, done):
+        light = sum(1 for c in checks if not c.heavy)
+        pools = {
+            False: ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, light)),
+                                      thread_name_prefix="scan-check"),
+            True: ThreadPoolExecutor(max_workers=self.heavy_workers,
+                                     thread_name_prefix="scan-heavy"),
+        }
+        lock = threading.Lock()
+        started, finished = {}, set()
+
+        def report(idx, result):
+            # First report wins: either the check itself or the watchdog
+            with lock:
+                if idx in finished:
+                    return
+                finished.add(idx)
+            done.put((idx, result))
+
+        def worker(idx, check):
+            with lock:
+                started[idx] = time.monotonic()
+            report(idx, _call_check(check.name, check.func, domain))
+
+        def watchdog():
+            while True:
+                now = time.monotonic()
+                with lock:
+                    if len(finished) == len(checks):
+                        return
+                    expired = [i for i, t in started.items()
+                               if i not in finished and now - t > self._timeout_for(checks[i])]
+                for idx in expired:
+                    report(idx, _timeout_result(checks[idx].name, self._timeout_for(checks[idx])))
+                time.sleep(0.5)
+
+        for idx in order:
+            check = checks[idx]
+            pools[check.heavy].submit(contextvars.copy_context().run, worker, idx, check)
+        threading.Thread(target=watchdog, name="scan-watchdog", daemon=True).start()
+
+        # Never block on stuck checks: abandoned threads finish in the background
+        for pool in pools.values():
+            pool.shutdown(wait=False)
+
+
+class AsyncioCheckExecutor(CheckExecutor):
+    """
+    Runs an event loop on a helper thread and bounds concurrency with one
+    semaphore per pool. The loop stays off the task thread so Django's
+    async-safety guard is never tripped.
+    """
+
+    def _start(self, domain, checks, order, done):
+        context = contextvars.copy_context()
+
+        def run_loop():
+            context.run(asyncio.run, self._run_all(domain, checks, order, done))
+
+        threading.Thread(target=run_loop, name="scan-loop", daemon=True).start()
+
+    async def _run_all(self, domain, checks, order, done):
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(
+            max_workers=min(self.max_workers + self.heavy_workers, len(checks)),
+            thread_name_prefix="scan-check",
+        )
+        semaphores = {
+            False: asyncio.Semaphore(self.max_workers),
+            True: asyncio.Semaphore(self.heavy_workers),
+        }
+
+        async def one(idx):
+            check = checks[idx]
+            timeout = self._timeout_for(check)
+            async with semaphores[check.heavy]:
+                try:
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(pool, functools.partial(
+                            contextvars.copy_context().run, _call_check, check.name, check.func, domain
+                        )),
+                        timeout=timeout,
+                    )
+                except asyncio.TimeoutError:
+                    result = _timeout_result(check.name, timeout)
+            done.put((idx, result))
+
+        try:
+            await asyncio.gather(*(one(i) for i in order))
+        finally:
+            pool.shutdown(wait=False)
+
+
+EXECUTORS = {
+    "threads": ThreadPoolCheckExecutor,
+    "asyncio": AsyncioCheckExecutor,
+}
+
+
+def get_executor(**kwargs):
+    name = getattr(settings, "SCANNER_EXECUTOR", "threads")
+    return EXECUTORS.get(name, ThreadPoolCheckExecutor)(**kwargs)
@@ -0,0 +1,80 @@
+# scanner/findings.py
+"""
+Normalized findings.
+
+When a scan is finalized, its findings are written to the ScanFinding table:
+one row per failed or warning check, with the module, standard, status and
+risk level as plain indexed columns and the details encrypted. Writing is
+idempotent (a re-finalized scan replaces its rows). A scan's rows become the
+current ones for its firm and domain, so "which of our domains fail OWASP A04
+right now" is
+
+    ScanFinding.objects.for_firm(firm).current().filter(
+        standard__startswith="OWASP A04", status="fail",
+    ).values_list("domain", flat=True).distinct()
+
+The backfill_findings management command fills the table for scans finalized
+before it existed.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ScanFinding, ScanResult
+from .registry import CHECKS_BY_NAME
+
+
+def _clip(value, length):
+    return str(value or "")[:length]
+
+
+def _row(scan, check_name, finding, found_at):
+    if isinstance(finding, str):
+        finding = {"title": finding, "details": finding}
+    check = CHECKS_BY_NAME.get(check_name)
+    return ScanFinding(
+        scan=scan,
+        firm_id=scan.firm_id,
+        domain=scan.domain,
+        check_name=_clip(check_name, 100),
+        module=_clip(finding.get("module") or (check.module if check else ""), 100),
+        standard=_clip(finding.get("standard") or (check.standard if check else ""), 100),
+        title=_clip(finding.get("title") or check_name or "Untitled", 255),
+        status=_clip(finding.get("status") or "fail", 10),
+        risk_level=_clip(finding.get("risk_level") or finding.get("severity"), 20),
+        details=str(finding.get("details") or ""),
+        found_at=found_at,
+    )
+
+
+def write_findings(scan, findings):
+    """
+    Replace the ScanFinding rows of a completed `scan`.
+    `findings`: [(check name, finding)]; the name may be "" for external results.
+    """
+    found_at = scan.completed_at or timezone.now()
+    rows = [_row(scan, name, finding, found_at) for name, finding in findings]
+    with transaction.atomic():
+        ScanFinding.objects.filter(scan=scan).delete()
+        # A clean scan also retires the previous findings; an older scan finalized late doesn't
+        superseded = ScanResult.objects.filter(
+            firm_id=scan.firm_id, domain=scan.domain, status="COMPLETED", completed_at__gt=found_at
+        ).exists()
+        if not superseded:
+            ScanFinding.objects.filter(firm_id=scan.firm_id, domain=scan.domain, is_current=True).update(is_current=False)
+        for row in rows:
+            row.is_current = not superseded
+        ScanFinding.objects.bulk_create(rows)
+    return len(rows)
+
+
+def findings_of(scan) -> list:
+    """(check name, finding) pairs of a finalized scan, rebuilt from its raw_data."""
+    raw_data = scan.raw_data
+    # "results" holds the full payloads in scans finalized before the compact "checks" map
+    checks = raw_data.get("checks") or raw_data.get("results", {})
+    names = {result.get("title"): name for name, result in checks.items()}
+    return [
+        (names.get(f.get("title"), "") if isinstance(f, dict) else "", f)
+        for f in raw_data.get("findings", [])
+    ]
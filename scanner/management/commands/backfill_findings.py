@@ -0,0 +1,29 @@
+# scanner/management/commands/backfill_findings.py
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from scanner.findings import findings_of, write_findings
+from scanner.models import ScanFinding, ScanResult
+
+
+class Command(BaseCommand):
+    help = 'Writes the ScanFinding rows of completed scans finalized before the findings table existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Scans decrypted per query')
+
+    def handle(self, *args, **options):
+        # Oldest first, so each domain's latest scan ends up current
+        scans = ScanResult.objects.filter(status='COMPLETED').exclude(
+            Exists(ScanFinding.objects.filter(scan=OuterRef('pk')))
+        ).only('firm_id', 'domain', 'completed_at', '_raw_data').order_by('completed_at', 'pk')
+
+        done = rows = 0
+        for scan in scans.iterator(chunk_size=options['batch_size']):
+            try:
+                rows += write_findings(scan, findings_of(scan))
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"Scan {scan.pk}: {e}"))
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} findings for {done} scans"))
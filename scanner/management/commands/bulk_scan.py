@@ -0,0 +1,39 @@
+# scanner/management/commands/bulk_scan.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from scanner.batch import parse_domains, start_batch
+from users.models import FirmProfile
+
+
+class Command(BaseCommand):
+    help = 'Queues a bulk portfolio scan for a firm from a list or CSV of domains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('domains', nargs='*', help='Domains to scan')
+        parser.add_argument('--firm', required=True, help='Firm id or firm domain')
+        parser.add_argument('--csv', dest='csv_path', help='CSV file (first column, or a "domain" column)')
+
+    def handle(self, *args, **options):
+        firm_ref = options['firm']
+        firm = FirmProfile.objects.filter(
+            Q(domain=firm_ref) | Q(pk=int(firm_ref)) if firm_ref.isdigit() else Q(domain=firm_ref)
+        ).select_related('user').first()
+        if not firm:
+            raise CommandError(f"Firm not found: {firm_ref}")
+
+        domains, invalid = parse_domains(options['domains'])
+        if options['csv_path']:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as f:
+                csv_domains, csv_invalid = parse_domains(f)
+            domains += [d for d in csv_domains if d not in domains]
+            invalid += csv_invalid
+        for value in invalid:
+            self.stdout.write(self.style.WARNING(f"Skipping invalid domain: {value}"))
+        if not domains:
+            raise CommandError("No valid domains to scan")
+
+        batch_id = start_batch(firm, domains, user=firm.user)
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {len(domains)} scans for {firm.firm_name} (batch {batch_id})"
+        ))
@@ -0,0 +1,15 @@
+# scanner/management/commands/compress_scan_blobs.py
+from django.core.management.base import BaseCommand
+
+from scanner.tasks import compress_scan_blobs
+
+
+class Command(BaseCommand):
+    help = 'Queues the background rewrite of uncompressed scan data and logs in the compressed format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Scans rewritten per task')
+
+    def handle(self, *args, **options):
+        compress_scan_blobs.delay(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Queued compress_scan_blobs; it re-queues itself until every scan is converted"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanresult',
+            name='batch_id',
+            field=models.CharField(blank=True, db_index=True, max_length=36, null=True),
+        ),
+    ]
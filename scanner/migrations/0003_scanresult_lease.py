@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0002_scanresult_batch_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanresult',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanresult',
+            name='resume_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
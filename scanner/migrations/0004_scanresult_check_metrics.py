@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0003_scanresult_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanresult',
+            name='check_metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.1 on 2026-10-17 02:58
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0004_scanresult_check_metrics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scanresult',
+            name='_breach_alerts',
+            field=core.fields.LazyEncryptedTextField(default='{}'),
+        ),
+        migrations.AlterField(
+            model_name='scanresult',
+            name='_checklist_status',
+            field=core.fields.LazyEncryptedTextField(default='{}'),
+        ),
+        migrations.AlterField(
+            model_name='scanresult',
+            name='_raw_data',
+            field=core.fields.LazyEncryptedTextField(default='{}'),
+        ),
+        migrations.AlterField(
+            model_name='scanresult',
+            name='scan_log',
+            field=core.fields.LazyEncryptedTextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:02
+
+import core.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0005_scanresult_lazy_decrypt'),
+        ('users', '0003_regulatorystandard_one_liner_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanFinding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain', models.CharField(max_length=255)),
+                ('check_name', models.CharField(blank=True, max_length=100)),
+                ('module', models.CharField(blank=True, max_length=100)),
+                ('standard', models.CharField(blank=True, max_length=100)),
+                ('title', models.CharField(max_length=255)),
+                ('status', models.CharField(max_length=10)),
+                ('risk_level', models.CharField(blank=True, max_length=20)),
+                ('details', core.fields.LazyEncryptedTextField(blank=True)),
+                ('found_at', models.DateTimeField()),
+                ('is_current', models.BooleanField(default=True)),
+                ('firm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_findings', to='users.firmprofile')),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='findings', to='scanner.scanresult')),
+            ],
+            options={
+                'ordering': ['-found_at'],
+                'indexes': [models.Index(fields=['firm', 'is_current', 'standard', 'status'], name='scanner_sca_firm_id_895afb_idx'), models.Index(fields=['firm', 'module'], name='scanner_sca_firm_id_a5d62b_idx'), models.Index(fields=['firm', 'found_at'], name='scanner_sca_firm_id_78bbe6_idx'), models.Index(fields=['firm', 'domain'], name='scanner_sca_firm_id_fe43c7_idx')],
+            },
+        ),
+    ]
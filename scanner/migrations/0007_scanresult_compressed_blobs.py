@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-17 03:03
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0006_scanfinding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scanresult',
+            name='_raw_data',
+            field=core.fields.CompressedEncryptedTextField(default='{}'),
+        ),
+        migrations.AlterField(
+            model_name='scanresult',
+            name='scan_log',
+            field=core.fields.CompressedEncryptedTextField(blank=True),
+        ),
+    ]
@@ -2,16 +2,31 @@
 
 from django.db import models
 from users.models import FirmProfile
-from encrypted_model_fields.fields import EncryptedTextField
+from core.fields import CompressedEncryptedTextField, LazyDecryptQuerySet, LazyEncryptedTextField
 from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
-from django.dispatch import receiver
-from django.db.models.signals import post_save
 from django.conf import settings
 import json
 import uuid
 
 
+# Columns list pages never show: the encrypted blobs and the large JSON ones
+LIST_DEFERRED_FIELDS = ("_raw_data", "_breach_alerts", "_checklist_status", "scan_log", "recommendations", "check_metrics")
+
+
+class ScanResultQuerySet(LazyDecryptQuerySet):
+    def for_firm(self, firm):
+        return self.filter(firm=firm)
+
+    def listing(self):
+        """Lightweight rows for list pages; the deferred columns load (and decrypt) on access."""
+        return self.defer(*LIST_DEFERRED_FIELDS)
+
+    def with_report(self):
+        """Join each scan's ComplianceReport, without its encrypted findings."""
+        return self.select_related("compliance_report").defer("compliance_report___findings")
+
+
 class ScanResult(models.Model):
     STATUS_CHOICES = [
         ("PENDING", "PENDING"),
@@ -44,27 +59,38 @@ class ScanResult(models.Model):
     current_step = models.CharField(max_length=200, blank=True, default="")
     progress = models.IntegerField(default=0)  # 0–100
 
-    # Encrypted raw outputs
-    _raw_data = EncryptedTextField(default="{}")
-    _breach_alerts = EncryptedTextField(default="{}")
-    _checklist_status = EncryptedTextField(default="{}")
+    # Encrypted raw outputs (decrypted on first access)
+    _raw_data = CompressedEncryptedTextField(default="{}")
+    _breach_alerts = LazyEncryptedTextField(default="{}")
+    _checklist_status = LazyEncryptedTextField(default="{}")
 
     # Computed results
     risk_score = models.FloatField(null=True, blank=True)
     grade = models.CharField(max_length=1, null=True, blank=True)
     recommendations = models.JSONField(default=list)
+    # Per-check timing: {name: {"wall_ms", "network_ms", "bytes", "requests"}} (scanner_tasks.timing)
+    check_metrics = models.JSONField(default=dict, blank=True)
     anomaly_score = models.FloatField(null=True, blank=True)
 
-    scan_log = EncryptedTextField(blank=True)
+    scan_log = CompressedEncryptedTextField(blank=True)
     pdf_report_path = models.CharField(max_length=500, null=True, blank=True)
 
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
 
+    # Bulk portfolio scan this belongs to (scanner.batch)
+    batch_id = models.CharField(max_length=36, null=True, blank=True, db_index=True)
+
+    # Running scans hold a lease renewed by the worker; expired leases are resumed (scanner.checkpoint)
+    lease_expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    resume_count = models.PositiveSmallIntegerField(default=0)
+
     # Public scan tracking ID
     scan_id = models.CharField(
         max_length=36, unique=True, default=uuid.uuid4, editable=False
     )
 
+    objects = ScanResultQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=["firm", "scan_date"]),
@@ -78,15 +104,26 @@ class ScanResult(models.Model):
     # ---------------------------------------------------------------- #
     # JSON helpers
     # ---------------------------------------------------------------- #
-    def _get_json(self, field):
-        return json.loads(field) if field else {}
+    # Decoded values are cached per instance, keyed by the text they were
+    # decoded from: any new text (a setter, refresh_from_db) is decoded again.
+    # The cached dict is shared between reads; assign it back to persist changes.
+    def _get_json(self, field_name):
+        text = getattr(self, field_name)
+        cache = self.__dict__.setdefault("_json_cache", {})
+        cached = cache.get(field_name)
+        if cached is not None and cached[0] is text:
+            return cached[1]
+        value = json.loads(text) if text else {}
+        cache[field_name] = (text, value)
+        return value
 
     def _set_json(self, field_name, value):
+        self.__dict__.get("_json_cache", {}).pop(field_name, None)
         setattr(self, field_name, json.dumps(value, cls=DjangoJSONEncoder))
 
     # Raw data
     def get_raw_data(self):
-        return self._get_json(self._raw_data)
+        return self._get_json("_raw_data")
 
     def set_raw_data(self, value):
         self._set_json("_raw_data", value)
@@ -95,7 +132,7 @@ class ScanResult(models.Model):
 
     # Breach alerts
     def get_breach_alerts(self):
-        return self._get_json(self._breach_alerts)
+        return self._get_json("_breach_alerts")
 
     def set_breach_alerts(self, value):
         self._set_json("_breach_alerts", value)
@@ -104,7 +141,7 @@ class ScanResult(models.Model):
 
     # Checklist results
     def get_checklist_status(self):
-        return self._get_json(self._checklist_status)
+        return self._get_json("_checklist_status")
 
     def set_checklist_status(self, value):
         self._set_json("_checklist_status", value)
@@ -140,25 +177,47 @@ class ScanResult(models.Model):
         return "—"
 
 
-# ---------------------------------------------------------------------- #
-# SIGNAL — Generate ComplianceReport When Scan Completes
-# ---------------------------------------------------------------------- #
-@receiver(post_save, sender=ScanResult)
-def create_compliance_report(sender, instance, created, **kwargs):
 
-    if instance.status != "COMPLETED":
-        return
+class ScanFindingQuerySet(LazyDecryptQuerySet):
+    def for_firm(self, firm):
+        return self.filter(firm=firm)
 
-    from reports.models import ComplianceReport
+    def current(self):
+        """Findings of each domain's latest completed scan."""
+        return self.filter(is_current=True)
 
-    report, created_report = ComplianceReport.objects.get_or_create(scan=instance)
 
-    # Copy findings if needed
-    findings = instance.raw_data.get("findings", [])
-    if findings and (created_report or not report.findings):
-        report.findings = findings
-        report.save()
+class ScanFinding(models.Model):
+    """
+    One failed or warning check of a completed scan, normalized out of the
+    encrypted raw_data so findings can be filtered and aggregated in SQL
+    (scanner.findings writes them when a scan is finalized). Only the
+    free-text details stay encrypted.
+    """
+    scan = models.ForeignKey(ScanResult, on_delete=models.CASCADE, related_name="findings")
+    firm = models.ForeignKey(FirmProfile, on_delete=models.CASCADE, related_name="scan_findings")
+    domain = models.CharField(max_length=255)
+    check_name = models.CharField(max_length=100, blank=True)
+    module = models.CharField(max_length=100, blank=True)
+    standard = models.CharField(max_length=100, blank=True)
+    title = models.CharField(max_length=255)
+    status = models.CharField(max_length=10)
+    risk_level = models.CharField(max_length=20, blank=True)
+    details = LazyEncryptedTextField(blank=True)
+    found_at = models.DateTimeField()
+    # False once a newer scan of the same firm and domain has completed
+    is_current = models.BooleanField(default=True)
+
+    objects = ScanFindingQuerySet.as_manager()
 
-    # Generate PDF if missing
-    if not report.pdf_file:
-        report.generate_pdf(request=None)
+    class Meta:
+        indexes = [
+            models.Index(fields=["firm", "is_current", "standard", "status"]),
+            models.Index(fields=["firm", "module"]),
+            models.Index(fields=["firm", "found_at"]),
+            models.Index(fields=["firm", "domain"]),
+        ]
+        ordering = ["-found_at"]
+
+    def __str__(self):
+        return f"{self.domain} – {self.title} – {self.status}"
@@ -0,0 +1,108 @@
+# scanner/progress.py
+"""
+Coalesced, throttled scan progress.
+
+Live progress is kept in the cache (Redis) and pushed to the `scan_<scan_id>`
+channel group at most SCANNER_PROGRESS_MAX_RATE times per second per scan;
+intermediate updates are coalesced and only the latest one is sent. Postgres is
+only written at milestones (start, 50%, finalize), so DB writes per scan stay
+constant no matter how many checks run.
+"""
+
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ScanResult
+
+PROGRESS_TTL = 60 * 60  # seconds; live progress outlives any scan
+MILESTONES = (50,)      # persisted besides start and finalize
+
+
+def _cache_key(scan_id):
+    return f"scan_progress:{scan_id}"
+
+
+def get_live_progress(scan_id):
+    """Latest {'progress', 'step', 'status'} published for a scan, or None."""
+    try:
+        return cache.get(_cache_key(scan_id))
+    except Exception:
+        return None
+
+
+def apply_live_progress(scan):
+    """Overlay live progress on a RUNNING scan loaded from the DB (which only has milestones)."""
+    if scan.status == "RUNNING":
+        live = get_live_progress(scan.scan_id)
+        if live:
+            scan.progress = live["progress"]
+            scan.current_step = live["step"]
+    return scan
+
+
+def count_completed(scan_id):
+    """Increment and return the number of finished checks of a scan whose checks run on several workers."""
+    key = f"scan_done:{scan_id}"
+    try:
+        cache.add(key, 0, timeout=PROGRESS_TTL)
+        return cache.incr(key)
+    except Exception:
+        return 0
+
+
+class ProgressPublisher:
+    def __init__(self, scan, max_rate=None):
+        self.scan = scan
+        rate = max_rate or getattr(settings, "SCANNER_PROGRESS_MAX_RATE", 2)
+        self.interval = 1.0 / rate
+        self._last_sent = 0.0
+        self._pending = None
+        self._milestones = [m for m in MILESTONES if m > (scan.progress or 0)]
+
+    def update(self, progress, step, **extra):
+        """Record progress; publish now if the rate allows, otherwise coalesce."""
+        self._pending = (progress, step, extra)
+        if self._milestones and progress >= self._milestones[0]:
+            self._milestones = [m for m in self._milestones if m > progress]
+            self._persist(progress, step)
+        if time.monotonic() - self._last_sent >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Publish the latest coalesced update, if any."""
+        if self._pending is None:
+            return
+        progress, step, extra = self._pending
+        self._pending = None
+        self._last_sent = time.monotonic()
+        payload = {"progress": progress, "step": step, "status": "RUNNING", **extra}
+
+        try:
+            cache.set(_cache_key(self.scan.scan_id), payload, timeout=PROGRESS_TTL)
+        except Exception as e:
+            print(f"Progress cache error: {e}")
+
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                f"scan_{self.scan.scan_id}",
+                {"type": "scan_update", **payload},
+            )
+        except Exception as e:
+            print(f"WS Error: {e}")
+
+    def _persist(self, progress, step):
+        self.scan.progress = progress
+        self.scan.current_step = step
+        ScanResult.objects.filter(pk=self.scan.pk).update(progress=progress, current_step=step)
+
+    def close(self):
+        """Drop the live entry once the final state is saved (the DB row is authoritative again)."""
+        self._pending = None
+        try:
+            cache.delete_many([_cache_key(self.scan.scan_id), f"scan_done:{self.scan.scan_id}"])
+        except Exception:
+            pass
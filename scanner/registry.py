@@ -0,0 +1,161 @@
+# scanner/registry.py
+"""
+Declarative registry of every scan check.
+
+Each Check states what it is (name, report module, standard), who gets it
+(the lowest subscription tier that includes it) and how expensive it is
+(cost class, probe dependencies, timeout) and which revision of its logic
+produced a result (version). The scan engine plans execution
+from this metadata instead of hand-sliced lists: cheap checks are started
+first and subprocess/network-scan checks run on their own small pool.
+
+Registry order is the order checks appear in the scan log and report.
+"""
+
+from dataclasses import dataclass
+
+from .scanner_tasks.gdpr import (
+    check_gdpr_dsar, check_gdpr_dpia, check_gdpr_retention, check_gdpr_dpo,
+    crawl_sitemap, check_cookies, check_privacy_policy
+)
+from .scanner_tasks.owasp import (
+    check_broken_access_control, check_crypto_failures, check_sql_injection,
+    check_missing_security_headers, check_security_misconfig, check_outdated_software,
+    check_auth_failures, check_integrity_failures, check_logging_monitoring, check_ssrf,
+    run_nikto_scan
+)
+from .scanner_tasks.iso27001 import check_iso27001_access_control
+from .scanner_tasks.pcidss import check_pci_dss_logging
+from .scanner_tasks.hipaa import check_hipaa_encryption, check_forms
+from .scanner_tasks.soc2 import check_soc2_access_reviews
+from .scanner_tasks.cis import check_cis_benchmark_1_4
+from .scanner_tasks.nist import check_third_party_scripts, run_nmap_vuln_scan
+from .scanner_tasks.encryption import check_tls
+from .scanner_tasks.probes import plan_probes
+
+# Tiers, cheapest first
+TIER_ORDER = ["free", "pro", "enterprise"]
+
+# Cost classes, cheapest first
+COST_STATIC = "static"          # no I/O
+COST_HTTP = "http"              # a handful of HTTP requests
+COST_SUBPROCESS = "subprocess"  # external tool (nikto)
+COST_NETWORK = "network"        # port / vulnerability scan (nmap)
+COST_ORDER = [COST_STATIC, COST_HTTP, COST_SUBPROCESS, COST_NETWORK]
+
+# Checks in these classes run on the separate heavy pool
+HEAVY_COSTS = {COST_SUBPROCESS, COST_NETWORK}
+
+
+@dataclass(frozen=True)
+class Check:
+    name: str
+    func: object
+    module: str
+    standard: str
+    tier: str = "free"
+    cost: str = COST_HTTP
+    timeout: int | None = None  # seconds; None uses SCANNER_CHECK_TIMEOUT
+    version: int = 1  # bump when the check's logic changes so stored results aren't reused
+
+    @property
+    def probes(self):
+        return getattr(self.func, "probes", ())
+
+    @property
+    def heavy(self):
+        return self.cost in HEAVY_COSTS
+
+    def available_in(self, tier):
+        return TIER_ORDER.index(self.tier) <= TIER_ORDER.index(tier)
+
+
+CHECKS = [
+    # --- GDPR ---
+    Check("GDPR: DSAR", check_gdpr_dsar, "GDPR", "GDPR Art. 15"),
+    Check("GDPR: DPIA", check_gdpr_dpia, "GDPR", "GDPR Art. 35"),
+    Check("GDPR: Retention", check_gdpr_retention, "GDPR", "GDPR Art. 5(1)(e)"),
+    Check("GDPR: DPO", check_gdpr_dpo, "GDPR", "GDPR Art. 37"),
+    Check("Sitemap & Robots", crawl_sitemap, "GDPR", "GDPR Art. 35", timeout=90, version=2),
+    Check("Cookie Consent", check_cookies, "GDPR", "GDPR Art. 7", version=2),
+    Check("Privacy Policy", check_privacy_policy, "GDPR", "GDPR, CCPA"),
+
+    # --- OWASP Top 10 (free) ---
+    Check("OWASP A01: Access Control", check_broken_access_control, "OWASP", "OWASP A01:2021"),
+    Check("OWASP A02: Crypto", check_crypto_failures, "OWASP", "OWASP A02:2021"),
+    Check("OWASP A03: Injection", check_sql_injection, "OWASP", "OWASP A03:2021"),
+    Check("OWASP A04: Headers", check_missing_security_headers, "OWASP", "OWASP A04:2021"),
+    Check("OWASP A05: Misconfig", check_security_misconfig, "OWASP", "OWASP A05:2021"),
+    Check("OWASP A06: Outdated", check_outdated_software, "OWASP", "OWASP A06:2021"),
+    Check("OWASP A07: Auth", check_auth_failures, "OWASP", "OWASP A07:2021"),
+
+    # --- Basic security ---
+    Check("SSL/TLS Check", check_tls, "Encryption", "PCI DSS Req 4.1"),
+    Check("Third-Party Scripts", check_third_party_scripts, "Supply Chain", "NIST", timeout=90, version=3),
+
+    # --- OWASP Top 10 (pro) ---
+    Check("OWASP A08: Integrity", check_integrity_failures, "OWASP", "OWASP A08:2021", tier="pro", cost=COST_STATIC),
+    Check("OWASP A09: Logging", check_logging_monitoring, "OWASP", "OWASP A09:2021", tier="pro"),
+    Check("OWASP A10: SSRF", check_ssrf, "OWASP", "OWASP A10:2021", tier="pro", cost=COST_STATIC),
+    Check("Nikto Scan", run_nikto_scan, "Vulnerability", "OWASP", tier="pro", cost=COST_SUBPROCESS, timeout=150),
+
+    # --- Pro frameworks ---
+    Check("ISO 27001 Access", check_iso27001_access_control, "ISO 27001", "ISO 27001 A.9.2.1", tier="pro"),
+    Check("PCI DSS Headers", check_pci_dss_logging, "PCI DSS", "PCI DSS 10.2", tier="pro"),
+
+    # --- Enterprise frameworks ---
+    Check("HIPAA Encryption", check_hipaa_encryption, "HIPAA", "HIPAA §164.312", tier="enterprise"),
+    Check("HIPAA Forms", check_forms, "HIPAA", "HIPAA", tier="enterprise", timeout=90, version=2),
+    Check("SOC 2 Access", check_soc2_access_reviews, "SOC 2", "SOC 2 CC6.1", tier="enterprise", cost=COST_STATIC),
+    Check("CIS Lockout", check_cis_benchmark_1_4, "CIS", "CIS 1.4", tier="enterprise", cost=COST_STATIC),
+    Check("Nmap Vuln Scan", run_nmap_vuln_scan, "Vulnerability", "NIST", tier="enterprise", cost=COST_NETWORK, timeout=900),
+]
+
+CHECKS_BY_NAME = {c.name: c for c in CHECKS}
+
+
+def checks_for_tier(tier: str) -> list:
+    """Checks included in `tier`, in registry order (unknown tiers get the free set)."""
+    tier = tier if tier in TIER_ORDER else "free"
+    return [c for c in CHECKS if c.available_in(tier)]
+
+
+def plan(checks) -> list:
+    """Indexes of `checks` in execution order: cheapest cost class first, registry order within a class."""
+    return sorted(range(len(checks)), key=lambda i: COST_ORDER.index(checks[i].cost))
+
+
+def shard(checks, n) -> list:
+    """
+    Split `checks` into at most `n` shards. Checks that read the same probe,
+    directly or through a probe's dependencies, stay in one shard so each
+    probe runs once per scan; these groups are dealt largest first, the rest
+    in plan() order, each to the smallest shard. Registry order is kept
+    within a shard.
+    """
+    groups = []  # [probe names, check indexes]
+    for i in plan(checks):
+        group = [set(plan_probes([checks[i]])), [i]]
+        for other in [g for g in groups if g[0] & group[0]]:
+            group[0] |= other[0]
+            group[1] += other[1]
+            groups.remove(other)
+        groups.append(group)
+
+    shards = [[] for _ in range(min(n, len(groups)))]
+    if not shards:
+        return []
+    for _, members in sorted(groups, key=lambda g: -len(g[1])):
+        min(shards, key=len).extend(members)
+    return [[checks[i] for i in sorted(members)] for members in shards]
+
+
+def cost_summary(checks) -> dict:
+    """Number of checks per cost class, e.g. {"http": 18, "subprocess": 1}."""
+    summary = {}
+    for c in checks:
+        summary[c.cost] = summary.get(c.cost, 0) + 1
+    return summary
+
+
+TIERS = {tier: checks_for_tier(tier) for tier in TIER_ORDER}
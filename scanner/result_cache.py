@@ -0,0 +1,68 @@
+# scanner/result_cache.py
+"""
+Domain-level reuse of per-check results.
+
+Finished check results are stored in the cache (Redis) under a content
+address: a hash of (normalized domain, check name, check version). A scan
+started within SCANNER_RESULT_REUSE_WINDOW seconds of an earlier scan of the
+same domain, by any firm, reuses those results instead of hitting the target
+again. Bumping a Check's version invalidates its stored results. Errors,
+timeouts and cancellations are never stored, nor are results marked
+"transient": a check that hit a network failure (the executor marks those) or
+reported one itself, whatever its status.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+NOT_REUSABLE = {"error", "cancelled"}
+
+
+def normalize_domain(domain: str) -> str:
+    """'HTTPS://Example.com/path' -> 'example.com'"""
+    domain = domain.strip().lower().replace("https://", "").replace("http://", "")
+    return domain.split("/")[0].rstrip(".")
+
+
+def _window():
+    return getattr(settings, "SCANNER_RESULT_REUSE_WINDOW", 3600)
+
+
+def result_key(domain, check):
+    digest = hashlib.sha256(f"{normalize_domain(domain)}|{check.name}|{check.version}".encode()).hexdigest()
+    return f"check_result:{digest}"
+
+
+def get_reusable(domain, checks) -> dict:
+    """{check name: {"result", "stored_at"}} for every check with a fresh stored result."""
+    if not _window() or not checks:
+        return {}
+    keys = {result_key(domain, c): c.name for c in checks}
+    try:
+        found = cache.get_many(list(keys))
+    except Exception as e:
+        print(f"Result cache error: {e}")
+        return {}
+    return {keys[k]: entry for k, entry in found.items()}
+
+
+def store_results(domain, checks, results):
+    """Store the reusable results of a run (`checks` and `results` in the same order)."""
+    window = _window()
+    if not window:
+        return
+    now = time.time()
+    entries = {
+        result_key(domain, c): {"result": r, "stored_at": now}
+        for c, r in zip(checks, results)
+        if r and r.get("status") not in NOT_REUSABLE and not r.get("transient")
+    }
+    if not entries:
+        return
+    try:
+        cache.set_many(entries, timeout=window)
+    except Exception as e:
+        print(f"Result cache error: {e}")
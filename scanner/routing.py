@@ -7,6 +7,9 @@ websocket_urlpatterns = [
     re_path(r'ws/scan/(?P<scan_id>[\w-]+)/$', consumers.ScanProgressConsumer.as_asgi()),
     
 
+    # Live progress of a bulk portfolio scan
+    re_path(r'ws/batch/(?P<batch_id>[\w-]+)/$', consumers.BatchProgressConsumer.as_asgi()),
+
     # Live notifications
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
 ]
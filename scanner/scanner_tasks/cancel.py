@@ -0,0 +1,58 @@
+# scanner/scanner_tasks/cancel.py
+# scanner_tasks/cancel.py
+"""
+In-process cancellation token for a running scan.
+
+The engine installs a CancelToken with cancel_scope(); the fetch layer and the
+subprocess runner call raise_if_cancelled() / token.wait() so a cancelled scan
+stops issuing requests and kills its external tools within a poll interval.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+_current_token = contextvars.ContextVar("scan_cancel_token", default=None)
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; True as soon as the scan is cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise ScanCancelled("Scan cancelled")
+
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    token_ref = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(token_ref)
+
+
+def current_token() -> CancelToken | None:
+    return _current_token.get()
+
+
+def raise_if_cancelled():
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
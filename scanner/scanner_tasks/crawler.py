@@ -0,0 +1,235 @@
+# scanner/scanner_tasks/crawler.py
+# scanner_tasks/crawler.py
+"""
+Bounded site crawler.
+
+Starting from the homepage and the URLs listed in the site's sitemaps
+(robots.txt `Sitemap:` lines, /sitemap.xml, sitemap indexes), pages on the
+scanned site are fetched breadth-first from a de-duplicated frontier:
+
+- robots.txt disallow rules and Crawl-delay are obeyed;
+- at most SCANNER_CRAWL_CONCURRENCY requests run at once, and requests to the
+  same host are spaced by the politeness delay;
+- the crawl stops at SCANNER_CRAWL_MAX_PAGES pages, SCANNER_CRAWL_MAX_BYTES
+  downloaded, SCANNER_CRAWL_MAX_DEPTH links from the homepage or
+  SCANNER_CRAWL_TIME_BUDGET seconds, whichever comes first.
+
+Pages go through get_document(), so they are parsed once and shared with every
+check of the scan. The resulting Corpus is published as the "crawl" probe.
+"""
+
+import contextvars
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urldefrag, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from django.conf import settings
+
+from .cancel import ScanCancelled, current_token
+from .document import get_document
+from .fetch import fetch
+
+ROBOTS_AGENT = "*"
+MAX_SITEMAPS = 10            # sitemap files read per crawl (indexes included)
+MAX_SITEMAP_BYTES = 5_000_000
+SKIP_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".zip", ".gz", ".mp4", ".mp3", ".woff", ".woff2", ".ttf", ".xml", ".json", ".doc", ".docx",
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Corpus:
+    """Pages fetched by one crawl, plus what was learned about robots.txt and sitemaps."""
+
+    def __init__(self):
+        self.pages = {}           # url -> Document (successful pages only)
+        self.robots_found = False
+        self.sitemap_found = False
+        self.sitemap_urls = 0     # URLs listed in the sitemaps
+        self.disallowed = 0       # URLs skipped because of robots.txt
+        self.bytes = 0
+        self.exhausted = False    # a budget ran out before the frontier did
+
+    @property
+    def urls(self) -> list:
+        return list(self.pages)
+
+    @property
+    def truncated_pages(self) -> list:
+        """Pages whose body was cut at SCANNER_HTTP_MAX_BODY"""
+        return [url for url, doc in self.pages.items() if doc.truncated]
+
+    @property
+    def forms(self) -> list:
+        return [f for doc in self.pages.values() for f in doc.forms]
+
+    @property
+    def script_srcs(self) -> list:
+        """Distinct script srcs across all pages, in discovery order"""
+        return list(dict.fromkeys(s for doc in self.pages.values() for s in doc.script_srcs))
+
+
+class _Politeness:
+    """Spaces requests to the same host by `delay` seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next.get(host, 0.0))
+            self._next[host] = at + self.delay
+        if at > now:
+            token = current_token()
+            if token is not None:
+                token.wait(at - now)
+            else:
+                time.sleep(at - now)
+
+
+def _load_robots(base):
+    """(RobotFileParser or None, sitemap URLs listed in robots.txt)"""
+    try:
+        r = fetch("GET", f"{base}/robots.txt")
+    except ScanCancelled:
+        raise
+    except Exception:
+        return None, []
+    if r.status_code != 200:
+        return None, []
+    parser = RobotFileParser()
+    parser.parse(r.text.splitlines())
+    return parser, list(parser.site_maps() or [])
+
+
+def _load_sitemaps(urls):
+    """(page URLs listed in the sitemaps, whether any sitemap was found); follows sitemap indexes."""
+    pending, read, found, pages = deque(urls), set(), False, []
+    while pending and len(read) < MAX_SITEMAPS:
+        url = pending.popleft()
+        if url in read:
+            continue
+        read.add(url)
+        try:
+            r = fetch("GET", url, content_types=None)  # sitemaps may be served gzipped
+            if r.status_code != 200 or r.truncated or len(r.content) > MAX_SITEMAP_BYTES:
+                continue
+            body = r.content
+            if body[:2] == b"\x1f\x8b":
+                # Bounded: a small .xml.gz must not inflate past the cap
+                body = zlib.decompressobj(zlib.MAX_WBITS | 16).decompress(body, MAX_SITEMAP_BYTES)
+            root = ET.fromstring(body)
+        except ScanCancelled:
+            raise
+        except Exception:
+            continue
+        found = True
+        locs = [el.text.strip() for el in root.iter() if el.tag.endswith("loc") and el.text]
+        if root.tag.endswith("sitemapindex"):
+            pending.extend(locs)
+        else:
+            pages.extend(locs)
+    return pages, found
+
+
+def crawl(domain: str, homepage=None) -> Corpus:
+    corpus = Corpus()
+    max_pages = _setting("SCANNER_CRAWL_MAX_PAGES", 50)
+    max_bytes = _setting("SCANNER_CRAWL_MAX_BYTES", 5_000_000)
+    max_depth = _setting("SCANNER_CRAWL_MAX_DEPTH", 2)
+    concurrency = _setting("SCANNER_CRAWL_CONCURRENCY", 4)
+    deadline = time.monotonic() + _setting("SCANNER_CRAWL_TIME_BUDGET", 45)
+
+    base = f"https://{domain}"
+    bare = domain[4:] if domain.startswith("www.") else domain
+    hosts = {bare, f"www.{bare}"}
+    if homepage is not None:
+        hosts.add(urlsplit(homepage.url).hostname)
+
+    robots, robots_sitemaps = _load_robots(base)
+    corpus.robots_found = robots is not None
+    delay = _setting("SCANNER_CRAWL_DELAY", 0.2)
+    if robots is not None:
+        delay = max(delay, float(robots.crawl_delay(ROBOTS_AGENT) or 0))
+    politeness = _Politeness(delay)
+
+    sitemap_pages, corpus.sitemap_found = _load_sitemaps(robots_sitemaps or [f"{base}/sitemap.xml"])
+    corpus.sitemap_urls = len(sitemap_pages)
+
+    frontier, seen = deque(), set()
+
+    def enqueue(url, depth):
+        url = urldefrag(url)[0]
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.hostname not in hosts:
+            return
+        if url in seen or depth > max_depth or parts.path.lower().endswith(SKIP_EXTENSIONS):
+            return
+        seen.add(url)
+        if robots is not None and not robots.can_fetch(ROBOTS_AGENT, url):
+            corpus.disallowed += 1
+            return
+        frontier.append((url, depth))
+
+    def visit(doc, depth):
+        corpus.bytes += doc.size
+        if doc.ok:
+            corpus.pages[doc.url] = doc
+            for href, _ in doc.links:
+                enqueue(href, depth + 1)
+
+    # The homepage is already parsed by its own probe
+    if homepage is not None:
+        seen.add(urldefrag(homepage.url)[0])
+        visit(homepage, 0)
+    else:
+        enqueue(base, 0)
+    for url in sitemap_pages:
+        enqueue(url, 1)
+
+    def load(url):
+        politeness.wait(urlsplit(url).hostname)
+        return get_document(url)
+
+    started = 1 if homepage is not None else 0
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scan-crawl")
+    running = {}
+    try:
+        while frontier or running:
+            out_of_budget = (started >= max_pages or corpus.bytes >= max_bytes
+                             or time.monotonic() > deadline)
+            if out_of_budget:
+                corpus.exhausted = bool(frontier)
+                if not running:
+                    break
+            while frontier and not out_of_budget and len(running) < concurrency and started < max_pages:
+                url, depth = frontier.popleft()
+                running[pool.submit(contextvars.copy_context().run, load, url)] = depth
+                started += 1
+
+            finished, _ = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in finished:
+                depth = running.pop(future)
+                try:
+                    visit(future.result(), depth)
+                except ScanCancelled:
+                    raise
+                except Exception:
+                    pass
+            if out_of_budget and not finished and time.monotonic() > deadline + 5:
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return corpus
@@ -0,0 +1,110 @@
+# scanner/scanner_tasks/document.py
+# scanner_tasks/document.py
+"""
+Parse-once HTML documents shared by all checks of a scan.
+
+Each page is parsed a single time (lxml when installed, html.parser otherwise)
+and reduced to the views the checks need: links with anchor text, script srcs,
+forms, the visible lowercase text and the lowercase raw HTML. The parse tree
+itself is dropped so a cached page only costs its extracted views.
+
+Pages fetched with revalidate=True (the homepage and the pages checks read
+directly) are revalidated against http_cache across scans: an unchanged page
+(304) is rebuilt from its stored views without being parsed.
+"""
+
+import importlib.util
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from requests.structures import CaseInsensitiveDict
+
+from . import http_cache
+from .fetch import cached, fetch
+
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# Stripped before extracting visible text
+NON_CONTENT_TAGS = ["script", "style", "nav", "footer"]
+
+
+class Document:
+    __slots__ = ("url", "status_code", "headers", "size", "truncated", "links", "script_srcs", "forms", "text", "html")
+    VIEWS = ("links", "script_srcs", "forms", "text", "html")
+
+    def __init__(self, url: str, html: str, status_code: int = 200, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.size = len(html)  # body length; 0 when rebuilt from a 304
+        self.truncated = False  # body was cut at SCANNER_HTTP_MAX_BODY
+        self.html = html.lower()  # markup included, for matches the visible text misses
+
+        soup = BeautifulSoup(html, HTML_PARSER)
+        # (absolute href, lowercase anchor text)
+        self.links = [
+            (urljoin(url, a["href"]), a.get_text(strip=True).lower())
+            for a in soup.find_all("a", href=True)
+        ]
+        self.script_srcs = [s["src"] for s in soup.find_all("script", src=True)]
+        self.forms = [
+            {"action": f.get("action", ""), "method": (f.get("method") or "get").lower()}
+            for f in soup.find_all("form")
+        ]
+
+        # Text last: it mutates the tree
+        for tag in soup(NON_CONTENT_TAGS):
+            tag.decompose()
+        self.text = soup.get_text(separator=" ").lower()
+
+    @classmethod
+    def from_views(cls, url: str, views: dict, status_code: int = 200, headers=None):
+        """Rebuild a document from views() without parsing."""
+        doc = cls.__new__(cls)
+        doc.url = url
+        doc.status_code = status_code
+        doc.headers = headers or {}
+        doc.size = 0
+        doc.truncated = False
+        for name in cls.VIEWS:
+            setattr(doc, name, views[name])
+        return doc
+
+    def views(self) -> dict:
+        return {name: getattr(self, name) for name in self.VIEWS}
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def find_link(self, keywords: list) -> str | None:
+        """First link whose anchor text contains any of the keywords"""
+        for href, text in self.links:
+            if any(k in text for k in keywords):
+                return href
+        return None
+
+
+def get_document(url: str, timeout: int | None = None, revalidate: bool = False) -> Document:
+    """
+    Fetch and parse `url` once per scan. With `revalidate`, the page is also
+    kept in and revalidated against http_cache across scans. Network errors propagate.
+    """
+    def loader():
+        stored = http_cache.lookup(url) if revalidate else None
+        if stored and not set(Document.VIEWS) <= stored["views"].keys():
+            stored = None  # stored before a view was added; fetch it in full
+        r = fetch("GET", url, timeout=timeout, headers=http_cache.conditional_headers(stored) or None)
+        if r.status_code == 304 and stored:
+            headers = CaseInsensitiveDict(stored["headers"])
+            headers.update(r.headers)
+            return Document.from_views(url, stored["views"], status_code=stored["status_code"], headers=headers)
+
+        doc = Document(url, r.text, status_code=r.status_code, headers=r.headers)
+        doc.size = len(r.content)
+        doc.truncated = getattr(r, "truncated", False)
+        if revalidate:
+            http_cache.store(url, r, doc.views())
+        return doc
+
+    return cached(("DOC", url), loader)
@@ -1,15 +1,19 @@
 # scanner/scanner_tasks/encryption.py
 # scanner_tasks/encryption.py
 
-import socket
 import ssl
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 
+from . import resolver
+from .probes import probe, get_probe, uses_probes
+from .timing import record_failure
+
+@probe("tls")
 def check_ssl_tls(domain):
     try:
         context = ssl.create_default_context()
-        with socket.create_connection((domain, 443), timeout=10) as sock:
+        with resolver.create_connection(domain, 443, timeout=10) as sock:
             with context.wrap_socket(sock, server_hostname=domain) as ssock:
                 cert = ssock.getpeercert(binary_form=True)
                 x509_cert = x509.load_der_x509_certificate(cert, default_backend())
@@ -25,4 +29,14 @@ def check_ssl_tls(domain):
                     "module": "Encryption",
                 }
     except Exception as e:
-        return {"title": "SSL/TLS", "status": "fail", "details": f"Error: {str(e)}", "module": "Encryption"}
\ No newline at end of file
+        # Certificate/handshake errors are findings; a refused or timed out connection is not
+        transient = isinstance(e, OSError) and not isinstance(e, ssl.SSLError)
+        if transient:
+            record_failure()
+        return {"title": "SSL/TLS", "status": "fail", "details": f"Error: {str(e)}", "module": "Encryption",
+                "transient": transient}
+
+@uses_probes("tls")
+def check_tls(domain):
+    """SSL/TLS check served from the shared TLS probe (one handshake per scan)"""
+    return dict(get_probe("tls", domain))
@@ -0,0 +1,105 @@
+# scanner/scanner_tasks/fetch.py
+# scanner_tasks/fetch.py
+"""
+Scan-scoped HTTP fetch layer.
+
+Inside `scan_scope()` every GET/HEAD issued through `fetch()` is downloaded
+once and shared by all checks of the scan: repeated requests get the cached
+response, and a request already in flight is waited on instead of re-sent.
+Outside a scope, `fetch()` is a plain request. Either way the request goes
+through the per-host keep-alive sessions in sessions.py.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from . import sessions
+from .cancel import ScanCancelled, raise_if_cancelled
+from .timing import record_failure
+
+_current_cache = contextvars.ContextVar("scan_fetch_cache", default=None)
+
+
+class FetchCache:
+    """Thread-safe keyed store with in-flight de-duplication (responses, parsed documents)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> Response or the exception raised fetching it
+        self._inflight = {}  # key -> threading.Event
+
+    def get(self, key, loader):
+        with self._lock:
+            if key in self._entries:
+                return self._unwrap(key)
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            return self._unwrap(key)
+
+        try:
+            value = loader()
+        except Exception as e:
+            value = e
+        with self._lock:
+            self._entries[key] = value
+            del self._inflight[key]
+        event.set()
+        return self._unwrap(key)
+
+    def _unwrap(self, key):
+        value = self._entries[key]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@contextmanager
+def scan_scope():
+    """Share one FetchCache between every check run inside the block."""
+    token = _current_cache.set(FetchCache())
+    try:
+        yield _current_cache.get()
+    finally:
+        _current_cache.reset(token)
+
+
+def cached(key, loader):
+    """
+    Memoize `loader()` under `key` for the active scan (no-op outside a scope).
+    A failure is recorded against the check that asked, so its result isn't reused.
+    """
+    cache = _current_cache.get()
+    try:
+        return loader() if cache is None else cache.get(key, loader)
+    except ScanCancelled:
+        raise
+    except Exception:
+        record_failure()
+        raise
+
+
+def fetch(method: str, url: str, timeout: int | None = None, allow_redirects: bool = True, headers=None,
+          content_types=sessions.TEXT_CONTENT_TYPES):
+    """
+    Issue a request over the pooled keep-alive sessions, served from the scan
+    cache when one is active. `timeout=None` uses SCANNER_HTTP_TIMEOUT.
+    Requests with extra `headers` (e.g. conditional GETs) are cached separately.
+    Bodies are capped (response.truncated) and only downloaded for
+    `content_types` (None accepts any); see sessions.read_body().
+    Raises ScanCancelled once the scan has been cancelled.
+    """
+    raise_if_cancelled()
+    def loader():
+        return sessions.request(method, url, timeout=timeout, allow_redirects=allow_redirects, headers=headers,
+                                content_types=content_types)
+
+    return cached((method.upper(), url, allow_redirects, tuple(sorted((headers or {}).items()))), loader)
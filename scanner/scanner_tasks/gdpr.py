@@ -1,14 +1,15 @@
 # scanner/scanner_tasks/gdpr.py
 # scanner_tasks/gdpr.py
 
-from .helpers import _find_link, _fetch_page_text
-import requests
+from .helpers import _find_link, _page_hits
+from .keywords import PAGE_KEYWORDS
+from .probes import get_probe, uses_probes
 import urllib3
 
+@uses_probes("homepage")
 def check_gdpr_dsar(domain: str):
     url = _find_link(domain, ["dsar", "data subject", "access my data"])
-    text = _fetch_page_text(f"https://{domain}")
-    found = any(k in text for k in ["dsar", "data subject access request"])
+    found = "dsar" in _page_hits(f"https://{domain}")
     status = "pass" if found or url else "fail"
     return {
         "title": "DSAR Endpoint (GDPR Art. 15)",
@@ -19,6 +20,7 @@ def check_gdpr_dsar(domain: str):
         "module": "GDPR",
     }
 
+@uses_probes("homepage")
 def check_gdpr_dpia(domain: str):
     policy_url = _find_link(domain, ["privacy policy", "privacy"])
     if not policy_url:
@@ -30,8 +32,7 @@ def check_gdpr_dpia(domain: str):
             "risk_level": "high",
             "module": "GDPR",
         }
-    text = _fetch_page_text(policy_url)
-    found = any(p in text for p in ["dpia", "data protection impact assessment"])
+    found = "dpia" in _page_hits(policy_url)
     status = "pass" if found else "warn"
     return {
         "title": "DPIA Mentioned (GDPR Art. 35)",
@@ -42,6 +43,7 @@ def check_gdpr_dpia(domain: str):
         "module": "GDPR",
     }
 
+@uses_probes("homepage")
 def check_gdpr_retention(domain: str):
     policy_url = _find_link(domain, ["privacy policy"])
     if not policy_url:
@@ -53,8 +55,7 @@ def check_gdpr_retention(domain: str):
             "risk_level": "high",
             "module": "GDPR",
         }
-    text = _fetch_page_text(policy_url)
-    found = any(p in text for p in ["retention period", "data will be deleted"])
+    found = "retention" in _page_hits(policy_url)
     status = "pass" if found else "warn"
     return {
         "title": "Data Retention Policy",
@@ -65,6 +66,7 @@ def check_gdpr_retention(domain: str):
         "module": "GDPR",
     }
 
+@uses_probes("homepage")
 def check_gdpr_dpo(domain: str):
     policy_url = _find_link(domain, ["privacy", "contact"])
     if not policy_url:
@@ -76,8 +78,7 @@ def check_gdpr_dpo(domain: str):
             "risk_level": "high",
             "module": "GDPR",
         }
-    text = _fetch_page_text(policy_url)
-    found = any(p in text for p in ["data protection officer", "dpo"])
+    found = "dpo" in _page_hits(policy_url)
     status = "pass" if found else "warn"
     return {
         "title": "DPO Appointed",
@@ -88,25 +89,32 @@ def check_gdpr_dpo(domain: str):
         "module": "GDPR",
     }
 
+@uses_probes("crawl")
 def crawl_sitemap(domain):
     try:
-        sitemap_ok = requests.head(f"https://{domain}/sitemap.xml", timeout=10, verify=True).status_code == 200
-        robots_ok = requests.head(f"https://{domain}/robots.txt", timeout=10, verify=True).status_code == 200
+        corpus = get_probe("crawl", domain)
+        sitemap_ok = corpus.sitemap_found
+        robots_ok = corpus.robots_found
         status = "pass" if sitemap_ok and robots_ok else "warn"
+        crawled = f"{len(corpus.pages)} pages crawled{' (budget reached)' if corpus.exhausted else ''}"
         return {
             "title": "Sitemap & Robots",
             "status": status,
-            "details": f"Sitemap: {'OK' if sitemap_ok else 'Missing'} | Robots: {'OK' if robots_ok else 'Missing'}",
+            "details": f"Sitemap: {f'{corpus.sitemap_urls} URLs' if sitemap_ok else 'Missing'} | "
+                       f"Robots: {'OK' if robots_ok else 'Missing'} | {crawled}",
             "standard": "GDPR Art. 35",
             "module": "GDPR",
+            "scanned_urls": corpus.urls,
         }
     except:
         return {"title": "Sitemap", "status": "warn", "details": "Not accessible", "module": "GDPR"}
 
+@uses_probes("homepage")
 def check_cookies(domain):
     try:
-        response = requests.get(f"https://{domain}", timeout=10, verify=True)
-        banner = any(x in response.text.lower() for x in ["cookie", "consent"])
+        # The shared homepage's raw HTML: banners often live only in markup and scripts
+        homepage = get_probe("homepage", domain)
+        banner = "cookie_banner" in PAGE_KEYWORDS.scan(homepage.html)
         status = "pass" if banner else "fail"
         return {
             "title": "Cookie Consent",
@@ -115,18 +123,20 @@ def check_cookies(domain):
             "standard": "GDPR Art. 7",
             "risk_level": "high" if not banner else "low",
             "module": "GDPR",
+            "truncated": homepage.truncated,
         }
     except:
         return {"title": "Cookies", "status": "fail", "details": "Site down", "module": "GDPR"}
 
+@uses_probes("homepage")
 def check_privacy_policy(domain):
     try:
         policy_url = _find_link(domain, ["privacy", "policy"])
         if not policy_url:
             return {"title": "Privacy Policy", "status": "fail", "details": "Not found", "module": "GDPR"}
-        text = _fetch_page_text(policy_url)
-        gdpr_score = sum(1 for k in ['gdpr', 'controller', 'erase', 'dpo'] if k in text)
-        ccpa = any(k in text for k in ['ccpa', 'california'])
+        hits = _page_hits(policy_url)
+        gdpr_score = len(hits.get("gdpr_terms", ()))
+        ccpa = "ccpa" in hits
         status = "pass" if gdpr_score >= 2 and ccpa else "warn"
         return {
             "title": "Privacy Policy",
@@ -1,10 +1,19 @@
 # scanner/scanner_tasks/helpers.py
 # scanner_tasks/helpers.py
 
+import contextvars
 import requests
+import subprocess
+import threading
+import time
 import urllib3
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+
+from .document import get_document
+from .cancel import ScanCancelled, current_token, raise_if_cancelled
+from .crawler import crawl
+from .fetch import cached, fetch
+from .keywords import PAGE_KEYWORDS
+from .probes import probe, get_probe
 
 SCANNER_API_URL = "https://api.complylaw-scanner.com/v1/scan"
 SCANNER_API_KEY = "your-api-key-here"
@@ -24,37 +33,100 @@ def connect_to_external_scanner(domain: str):
         pass
     return None
 
-def _fetch_page_text(url: str, timeout: int = 10) -> str:
-    """Fetch page text safely with SSL verification"""
+def _http_get(url: str, timeout: int | None = None, allow_redirects: bool = True):
+    """GET through the scan-scoped fetch cache"""
+    return fetch("GET", url, timeout=timeout, allow_redirects=allow_redirects)
+
+def _http_head(url: str, timeout: int | None = None, allow_redirects: bool = False):
+    """HEAD through the scan-scoped fetch cache"""
+    return fetch("HEAD", url, timeout=timeout, allow_redirects=allow_redirects)
+
+def _fetch_page_text(url: str, timeout: int | None = None) -> str:
+    """Visible lowercase page text from the scan's parsed document cache"""
     try:
-        r = requests.get(url, timeout=timeout, allow_redirects=True, verify=True)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        for tag in soup(["script", "style", "nav", "footer"]):
-            tag.decompose()
-        return soup.get_text(separator=" ").lower()
+        doc = get_document(url, timeout=timeout, revalidate=True)
+        return doc.text if doc.ok else ""
     except Exception:
         return ""
 
+def _page_hits(url: str) -> dict:
+    """Keyword hits ({rule id: keywords}) on a page's text, matched once per scan"""
+    return cached(("KEYWORDS", url), lambda: PAGE_KEYWORDS.scan(_fetch_page_text(url)))
+
 def _find_link(domain: str, keywords: list, base_url: str | None = None) -> str | None:
     """Find first <a> link containing any of the keywords"""
-    if not base_url:
-        base_url = f"https://{domain}"
     try:
-        r = requests.get(base_url, timeout=10, allow_redirects=True, verify=True)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        for a in soup.find_all("a", href=True):
-            if any(k in a.get_text(strip=True).lower() for k in keywords):
-                return urljoin(base_url, a["href"])
+        doc = get_document(base_url) if base_url else get_probe("homepage", domain)
+        if doc.ok:
+            return doc.find_link(keywords)
     except Exception:
         pass
     return None
 
+@probe("homepage")
+def _get_homepage(domain: str):
+    """Parsed homepage document"""
+    return get_document(f"https://{domain}", revalidate=True)
+
+@probe("crawl", requires=("homepage",))
+def _crawl_site(domain: str):
+    """Pages reachable from the homepage and sitemaps, within the crawl budgets"""
+    try:
+        homepage = get_probe("homepage", domain)
+    except ScanCancelled:
+        raise
+    except Exception:
+        homepage = None
+    return crawl(domain, homepage=homepage)
+
+@probe("headers")
 def _get_headers(domain: str):
     """Return headers with SSL verification"""
     try:
-        r = requests.head(f"https://{domain}", timeout=10, allow_redirects=True, verify=True)
+        r = _http_head(f"https://{domain}", allow_redirects=True)
         return r.headers
     except:
         return {}
+
+
+def _run_subprocess(cmd: list, timeout: int, on_line=None):
+    """
+    Run an external tool and return (returncode, stdout).
+    stdout is read line by line as the tool writes it; `on_line(line)` is called
+    for each line (on the reader thread, in the caller's context).
+    The process is killed on timeout (TimeoutExpired) or when the scan is cancelled (ScanCancelled).
+    """
+    raise_if_cancelled()
+    token = current_token()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+    output = []
+
+    def read():
+        for line in proc.stdout:
+            output.append(line)
+            if on_line:
+                try:
+                    on_line(line.rstrip("\n"))
+                except Exception as e:
+                    print(f"Subprocess line handler error: {e}")
+
+    reader = threading.Thread(target=contextvars.copy_context().run, args=(read,), daemon=True)
+    reader.start()
+
+    deadline = time.monotonic() + timeout
+    while proc.poll() is None:
+        if token is not None and token.cancelled:
+            proc.kill()
+            proc.wait()
+            raise ScanCancelled("Scan cancelled")
+        if time.monotonic() > deadline:
+            proc.kill()
+            proc.wait()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if token is not None:
+            token.wait(0.5)
+        else:
+            time.sleep(0.5)
+
+    reader.join()
+    return proc.returncode, "".join(output)
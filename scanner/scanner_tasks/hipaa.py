@@ -1,30 +1,34 @@
 # scanner/scanner_tasks/hipaa.py
 # scanner_tasks/hipaa.py
 
-from .encryption import check_ssl_tls
-import requests
+from urllib.parse import urljoin, urlsplit
+
+from .probes import get_probe, uses_probes
 import urllib3
-from bs4 import BeautifulSoup
 
+@uses_probes("tls")
 def check_hipaa_encryption(domain: str):
-    result = check_ssl_tls(domain)
+    result = dict(get_probe("tls", domain))
     result["module"] = "HIPAA"
     result["standard"] = "HIPAA §164.312"
     return result
 
+@uses_probes("crawl")
 def check_forms(domain):
     try:
-        response = requests.get(f"https://{domain}", timeout=10, verify=True)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        forms = soup.find_all('form')
-        encrypted = all(f.get('action', '').startswith('https') for f in forms if f.get('action'))
+        corpus = get_probe("crawl", domain)
+        forms = corpus.forms
+        # Relative actions post to the page's own scheme
+        actions = [urljoin(url, f['action']) for url, doc in corpus.pages.items() for f in doc.forms if f.get('action')]
+        encrypted = all(urlsplit(action).scheme == 'https' for action in actions)
         status = "pass" if encrypted else "fail"
         return {
             "title": "Data Forms",
             "status": status,
-            "details": f"{len(forms)} forms | HTTPS: {'Yes' if encrypted else 'No'}",
+            "details": f"{len(forms)} forms on {len(corpus.pages)} pages | HTTPS: {'Yes' if encrypted else 'No'}",
             "standard": "HIPAA",
             "module": "HIPAA",
+            "truncated": bool(corpus.truncated_pages),
         }
     except:
         return {"title": "Forms", "status": "error", "details": "Failed", "module": "HIPAA"}
\ No newline at end of file
@@ -0,0 +1,78 @@
+# scanner/scanner_tasks/http_cache.py
+# scanner_tasks/http_cache.py
+"""
+Conditional-GET page cache that persists across scans.
+
+Only pages the checks read directly (the homepage and the policy pages they
+follow from it) take part; crawled pages don't. When such a page comes back 200
+with an ETag or Last-Modified validator, its validators and its extracted
+document views (links, scripts, forms, text, raw HTML) are kept in the
+SCANNER_HTTP_CACHE_ALIAS cache (its own Redis database by default) for
+SCANNER_HTTP_CACHE_TTL seconds, unless the entry is larger than
+SCANNER_HTTP_CACHE_MAX_ENTRY bytes. The next scan revalidates with
+If-None-Match / If-Modified-Since; on 304 the stored views are reused and the
+page is neither downloaded nor parsed again.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _ttl():
+    return getattr(settings, "SCANNER_HTTP_CACHE_TTL", 60 * 60 * 24)
+
+
+def _store():
+    return caches[getattr(settings, "SCANNER_HTTP_CACHE_ALIAS", "scanner_http")]
+
+
+def _key(url):
+    return f"http_doc:{hashlib.sha256(url.encode()).hexdigest()}"
+
+
+def lookup(url: str) -> dict | None:
+    """Stored entry for `url` ({"etag", "last_modified", "status_code", "headers", "views"}), or None."""
+    if not _ttl():
+        return None
+    try:
+        return _store().get(_key(url))
+    except Exception as e:
+        print(f"HTTP cache error: {e}")
+        return None
+
+
+def conditional_headers(entry: dict | None) -> dict:
+    """Revalidation headers for a stored entry."""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def store(url: str, response, views: dict):
+    """Keep `views` of a complete 200 response that carries a validator; others can't be revalidated."""
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not _ttl() or response.status_code != 200 or not (etag or last_modified):
+        return
+    if getattr(response, "truncated", False):
+        return
+    entry = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "views": views,
+    }
+    if len(json.dumps(entry)) > getattr(settings, "SCANNER_HTTP_CACHE_MAX_ENTRY", 256_000):
+        return
+    try:
+        _store().set(_key(url), entry, timeout=_ttl())
+    except Exception as e:
+        print(f"HTTP cache error: {e}")
@@ -1,14 +1,15 @@
 # scanner/scanner_tasks/iso27001.py
 # scanner_tasks/iso27001.py
 
-from .helpers import _find_link, _fetch_page_text
+from .helpers import _find_link, _page_hits
+from .probes import uses_probes
 
+@uses_probes("homepage")
 def check_iso27001_access_control(domain: str):
     policy_url = _find_link(domain, ["terms", "aup"])
     if not policy_url:
         return {"title": "Access Policy (ISO)", "status": "warn", "details": "Missing", "standard": "ISO A.9", "module": "ISO 27001"}
-    text = _fetch_page_text(policy_url)
-    found = "registration" in text
+    found = "access_policy" in _page_hits(policy_url)
     status = "pass" if found else "warn"
     return {
         "title": "User Access Policy",
@@ -0,0 +1,26 @@
+# scanner/scanner_tasks/keywords.py
+# scanner_tasks/keywords.py
+"""
+Keyword rules for the policy/page text checks.
+
+All rules live in one matcher, so a page is scanned once per scan no matter
+how many checks look at it (see helpers._page_hits).
+"""
+
+from core.keywords import KeywordMatcher
+
+PAGE_KEYWORDS = KeywordMatcher({
+    # GDPR
+    "dsar": ["dsar", "data subject access request"],
+    "dpia": ["dpia", "data protection impact assessment"],
+    "retention": ["retention period", "data will be deleted"],
+    "dpo": ["data protection officer", "dpo"],
+    "cookie_banner": ["cookie", "consent"],
+    "gdpr_terms": ["gdpr", "controller", "erase", "dpo"],
+    "ccpa": ["ccpa", "california"],
+    # OWASP
+    "mfa": ["mfa", "2fa", "two-factor"],
+    "sql_error": ["sql", "syntax"],
+    # ISO 27001
+    "access_policy": ["registration"],
+})
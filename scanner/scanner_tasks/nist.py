@@ -1,31 +1,85 @@
 # scanner/scanner_tasks/nist.py
 # scanner_tasks/nist.py
 
+import ipaddress
+import os
+import re
+import tempfile
+from urllib.parse import urljoin, urlsplit
+
 import nmap
-import requests
+from . import resolver
+from .cancel import ScanCancelled
+from .helpers import _run_subprocess
+from .probes import get_probe, uses_probes
+from .stream import emit
 import urllib3
-from bs4 import BeautifulSoup
 
+def _third_party_hosts(domain, pages) -> list:
+    """Distinct hosts outside the target site that `pages` ({url: Document}) load scripts from."""
+    site = domain.lower().removeprefix("www.")
+    hosts = {}
+    for url, doc in pages.items():
+        for src in doc.script_srcs:
+            host = (urlsplit(urljoin(url, src)).hostname or "").lower()
+            if host and host != site and not host.endswith(f".{site}"):
+                hosts[host] = None
+    return list(hosts)
+
+@uses_probes("crawl")
 def check_third_party_scripts(domain):
     try:
-        response = requests.get(f"https://{domain}", timeout=10, verify=True)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        external = [s['src'] for s in soup.find_all('script', src=True) if domain not in s['src']]
+        corpus = get_probe("crawl", domain)
+        # Counted per host, so a vendor loaded on every crawled page counts once
+        external = _third_party_hosts(domain, corpus.pages)
         status = "warn" if len(external) > 8 else "pass"
         return {
             "title": "Third-Party Scripts",
             "status": status,
-            "details": f"{len(external)} external",
+            "details": f"{len(external)} external hosts",
             "standard": "NIST",
             "module": "Supply Chain",
+            "truncated": bool(corpus.truncated_pages),
         }
     except:
         return {"title": "Scripts", "status": "error", "details": "Failed", "module": "Supply Chain"}
 
+_NMAP_PERCENT = re.compile(r"About ([\d.]+)% done")
+_NMAP_OPEN_PORT = re.compile(r"Discovered open port (\d+)/(\w+)")
+
+def _nmap_line(line):
+    # Verbose stdout: periodic "About 42.10% done" stats and ports as they are found
+    m = _NMAP_PERCENT.search(line)
+    if m:
+        emit(percent=float(m.group(1)))
+        return
+    m = _NMAP_OPEN_PORT.search(line)
+    if m:
+        emit(vulnerability={"port": int(m.group(1)), "protocol": m.group(2), "details": "open port"})
+
 def run_nmap_vuln_scan(domain):
+    report = tempfile.NamedTemporaryFile(suffix=".xml", delete=False)
+    report.close()
     try:
+        # Run nmap ourselves (same scan python-nmap builds) so it can be killed on cancel
+        # and its verbose output streamed; the XML report is parsed when it finishes
+        cmd = ['nmap', '-v', '--stats-every', '10s', '-oX', report.name,
+               '--top-ports', '100', '-sV', '--script', 'vuln']
+        # Scan the address the DNS stage resolved; scripts still send the domain as Host/SNI
+        addresses = resolver.addresses(domain)
+        if addresses:
+            # IPv4 when there is one; nmap needs -6 to scan a v6 address
+            target = min(addresses, key=lambda a: ipaddress.ip_address(a).version)
+            if ipaddress.ip_address(target).version == 6:
+                cmd.append('-6')
+            cmd += ['-n', '--script-args', f'http.host={domain},tls.servername={domain}', target]
+        else:
+            cmd.append(domain)
+        _run_subprocess(cmd, timeout=840, on_line=_nmap_line)
+        with open(report.name) as f:
+            xml = f.read()
         nm = nmap.PortScanner()
-        nm.scan(domain, arguments='--top-ports 100 -sV --script vuln')
+        nm.analyse_nmap_xml_scan(nmap_xml_output=xml)
         vulns = []
         for host in nm.all_hosts():
             for proto in nm[host].all_protocols():
@@ -44,5 +98,9 @@ def run_nmap_vuln_scan(domain):
             "vulnerabilities": vulns,
             "module": "Vulnerability",
         }
+    except ScanCancelled:
+        raise
     except:
-        return {"title": "Nmap", "status": "error", "details": "Failed", "module": "Vulnerability"}
\ No newline at end of file
+        return {"title": "Nmap", "status": "error", "details": "Failed", "module": "Vulnerability"}
+    finally:
+        os.unlink(report.name)
@@ -1,16 +1,19 @@
 # scanner/scanner_tasks/owasp.py
 # scanner_tasks/owasp.py
 
-import requests
 import urllib3
-from .helpers import _get_headers, _find_link, _fetch_page_text
-from .encryption import check_ssl_tls
-import subprocess
+from .helpers import _find_link, _http_get, _page_hits, _run_subprocess
+from .keywords import PAGE_KEYWORDS
+from .probes import get_probe, uses_probes
 import json
+import os
+import tempfile
+from .cancel import ScanCancelled
+from .stream import emit
 
 def check_broken_access_control(domain: str):
     try:
-        resp = requests.get(f"https://{domain}/admin", timeout=10, verify=True, allow_redirects=False)
+        resp = _http_get(f"https://{domain}/admin", allow_redirects=False)
         status = "fail" if resp.status_code in [200, 301, 302] else "pass"
         return {
             "title": "Admin Endpoint Exposure (A01)",
@@ -23,8 +26,9 @@ def check_broken_access_control(domain: str):
     except:
         return {"title": "Access Control", "status": "pass", "details": "/admin not found", "module": "OWASP"}
 
+@uses_probes("tls")
 def check_crypto_failures(domain: str):
-    result = check_ssl_tls(domain)
+    result = dict(get_probe("tls", domain))
     if result["status"] in ["warn", "fail"]:
         result.update({
             "title": "Weak TLS (A02)",
@@ -39,8 +43,8 @@ def check_sql_injection(domain: str):
     vulnerable = False
     for p in payloads:
         try:
-            r = requests.get(f"https://{domain}/search?q={p}", timeout=8, verify=True)
-            if any(err in r.text.lower() for err in ["sql", "syntax"]):
+            r = _http_get(f"https://{domain}/search?q={p}", timeout=8)
+            if "sql_error" in PAGE_KEYWORDS.scan(r.text.lower()):
                 vulnerable = True
                 break
         except:
@@ -55,8 +59,9 @@ def check_sql_injection(domain: str):
         "module": "OWASP",
     }
 
+@uses_probes("headers")
 def check_missing_security_headers(domain: str):
-    headers = _get_headers(domain)
+    headers = get_probe("headers", domain)
     required = ["Content-Security-Policy", "X-Frame-Options", "X-Content-Type-Options"]
     missing = [h for h in required if h not in headers]
     status = "fail" if missing else "pass"
@@ -71,7 +76,7 @@ def check_missing_security_headers(domain: str):
 
 def check_security_misconfig(domain: str):
     try:
-        resp = requests.get(f"https://{domain}/phpinfo.php", timeout=10, verify=True)
+        resp = _http_get(f"https://{domain}/phpinfo.php")
         if resp.status_code == 200 and "phpinfo()" in resp.text:
             return {
                 "title": "PHP Info Exposure (A05)",
@@ -85,8 +90,9 @@ def check_security_misconfig(domain: str):
         pass
     return {"title": "Misconfig", "status": "pass", "details": "No exposure", "module": "OWASP"}
 
+@uses_probes("headers")
 def check_outdated_software(domain: str):
-    headers = _get_headers(domain)
+    headers = get_probe("headers", domain)
     server = headers.get("Server", "").lower()
     powered = headers.get("X-Powered-By", "").lower()
     outdated = []
@@ -104,12 +110,12 @@ def check_outdated_software(domain: str):
         "module": "OWASP",
     }
 
+@uses_probes("homepage")
 def check_auth_failures(domain: str):
     login_url = _find_link(domain, ["login", "sign in"])
     if not login_url:
         return {"title": "Login Not Found (A07)", "status": "warn", "details": "No login", "module": "OWASP"}
-    text = _fetch_page_text(login_url)
-    weak = not any(p in text for p in ["mfa", "2fa", "two-factor"])
+    weak = "mfa" not in _page_hits(login_url)
     status = "warn" if weak else "pass"
     return {
         "title": "Weak Auth (A07)",
@@ -125,7 +131,7 @@ def check_integrity_failures(domain: str):
 
 def check_logging_monitoring(domain: str):
     try:
-        r = requests.get(f"https://{domain}/error.log", timeout=10, verify=True)
+        r = _http_get(f"https://{domain}/error.log")
         if r.status_code == 200:
             return {
                 "title": "Error Log Exposure (A09)",
@@ -142,13 +148,31 @@ def check_logging_monitoring(domain: str):
 def check_ssrf(domain: str):
     return {"title": "SSRF (A10)", "status": "pass", "details": "Blocked", "module": "OWASP"}
 
+def _nikto_finding(line):
+    # Findings on stdout look like "+ /path: description"; other "+ " lines are banner info
+    if line.startswith("+ /"):
+        path, _, msg = line[2:].partition(": ")
+        return {"url": path, "msg": msg.strip()}
+    return None
+
 def run_nikto_scan(domain):
+    report = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+    report.close()
     try:
-        cmd = ['nikto', '-h', f"https://{domain}", '-Format', 'json', '-output', '-']
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            vulns = data.get('vulnerabilities', [])
+        def on_line(line):
+            finding = _nikto_finding(line)
+            if finding:
+                emit(vulnerability=finding)
+
+        # Findings stream from stdout while it runs; the JSON report is the final word
+        cmd = ['nikto', '-h', f"https://{domain}", '-Format', 'json', '-output', report.name]
+        returncode, _ = _run_subprocess(cmd, timeout=120, on_line=on_line)
+        if returncode == 0:
+            with open(report.name) as f:
+                data = json.load(f)
+            # Newer nikto writes one object per host
+            hosts = data if isinstance(data, list) else [data]
+            vulns = [v for h in hosts for v in h.get('vulnerabilities', [])]
             status = "fail" if vulns else "pass"
             return {
                 "title": "Nikto Web Vulns",
@@ -159,6 +183,10 @@ def run_nikto_scan(domain):
                 "vulnerabilities": vulns,
                 "module": "Vulnerability",
             }
+    except ScanCancelled:
+        raise
     except:
         pass
-    return {"title": "Nikto", "status": "error", "details": "Failed", "module": "Vulnerability"}
\ No newline at end of file
+    finally:
+        os.unlink(report.name)
+    return {"title": "Nikto", "status": "error", "details": "Failed", "module": "Vulnerability"}
@@ -1,10 +1,11 @@
 # scanner/scanner_tasks/pcidss.py
 # scanner_tasks/pcidss.py
 
-from .helpers import _get_headers
+from .probes import get_probe, uses_probes
 
+@uses_probes("headers")
 def check_pci_dss_logging(domain: str):
-    headers = _get_headers(domain)
+    headers = get_probe("headers", domain)
     leaked = any(k in headers.get("Server", "") for k in ["Apache", "nginx", "IIS"])
     status = "fail" if leaked else "pass"
     return {
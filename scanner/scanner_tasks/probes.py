@@ -0,0 +1,107 @@
+# scanner/scanner_tasks/probes.py
+# scanner_tasks/probes.py
+"""
+Shared probes: expensive observations several checks derive their result from
+(the TLS handshake, the response headers, the parsed homepage, ...).
+
+A probe is registered with @probe(name, requires=[...]) and read by checks with
+get_probe(name, domain). Within a scan each probe runs exactly once and its
+result is handed to every dependent check. Checks declare what they read with
+@uses_probes(...) so the engine can start the probes up front, dependencies
+first, while the checks are being scheduled.
+
+Probe results are shared — copy before mutating. A probe that swallowed a
+network failure (and returned e.g. empty headers) still counts as failed for
+every check that reads it, so their results aren't reused.
+"""
+
+import contextvars
+import threading
+from graphlib import TopologicalSorter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .fetch import cached
+from .timing import count_failures, measure, record_failure
+
+PROBES = {}  # name -> (func, requires)
+
+
+def probe(name: str, requires=()):
+    """Register `func(domain)` as the probe `name`."""
+    def decorator(func):
+        PROBES[name] = (func, tuple(requires))
+        return func
+    return decorator
+
+
+def uses_probes(*names):
+    """Declare the probes a check reads."""
+    def decorator(func):
+        func.probes = tuple(names)
+        return func
+    return decorator
+
+
+def get_probe(name: str, domain: str):
+    """Result of probe `name` for the active scan, computed once and shared."""
+    func, _ = PROBES[name]
+
+    def run():
+        with count_failures() as failures:
+            value = func(domain)
+        return value, failures[0]
+
+    value, failures = cached(("PROBE", name, domain), run)
+    if failures:
+        record_failure()
+    return value
+
+
+def plan_probes(checks) -> list:
+    """Probes needed by `checks` (registry.Check list) and their dependencies, in topological order."""
+    graph, pending = {}, [p for check in checks for p in check.probes]
+    while pending:
+        name = pending.pop()
+        if name in graph:
+            continue
+        graph[name] = PROBES[name][1]
+        pending.extend(graph[name])
+    return list(TopologicalSorter(graph).static_order())
+
+
+def start_probes(domain: str, checks):
+    """
+    Run the probes `checks` depend on in the background, each as soon as its
+    own dependencies are done. Returns immediately; a check that asks for a
+    probe still in flight simply waits for it.
+    """
+    names = plan_probes(checks)
+    if not names:
+        return None
+
+    sorter = TopologicalSorter({n: PROBES[n][1] for n in names})
+    sorter.prepare()
+    context = contextvars.copy_context()
+
+    def run():
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="scan-probe") as pool:
+            running = {}
+            while sorter.is_active():
+                for name in sorter.get_ready():
+                    running[pool.submit(contextvars.copy_context().run, _warm, name, domain)] = name
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sorter.done(running.pop(future))
+
+    thread = threading.Thread(target=context.run, args=(run,), name="scan-probes", daemon=True)
+    thread.start()
+    return thread
+
+
+def _warm(name, domain):
+    try:
+        with measure(f"probe:{name}"):
+            get_probe(name, domain)
+    except Exception:
+        # Cached with the probe; dependent checks handle it themselves
+        pass
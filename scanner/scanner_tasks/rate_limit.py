@@ -0,0 +1,241 @@
+# scanner/scanner_tasks/rate_limit.py
+# scanner_tasks/rate_limit.py
+"""
+Distributed per-target rate limiting.
+
+Every request to a target takes a token from a bucket keyed by the target host
+(and, with SCANNER_RATE_LIMIT_BY_IP, by its resolved IP so sites behind one
+shared hosting provider are throttled together; the IP comes from the DNS
+stage's TTL-bound cache). Buckets live in Redis and are
+updated by one Lua script, so all scan workers share them: concurrent scans
+and bulk batches against the same target are spaced out instead of tripping
+its WAF.
+
+A 429 or 503 from the target is a strike: the bucket's rate is halved per
+recent strike and the key is blocked for Retry-After seconds (or an
+exponential backoff without one). Retries of throttled requests wait on the
+same bucket, so they go out when the target allows it again.
+
+If Redis is unreachable, each process falls back to its own in-memory buckets.
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import redis
+from django.conf import settings
+
+from . import resolver
+from .cancel import current_token, raise_if_cancelled
+
+# Responses that mean "slow down"
+BACKOFF_STATUSES = (429, 503)
+
+MAX_STRIKES = 6  # rate floor: base rate / 2**MAX_STRIKES
+REDIS_RETRY_INTERVAL = 30  # seconds on local buckets after a Redis error
+
+# KEYS: tokens hash, strikes counter, block-until
+# ARGV: rate (tokens/s), burst, now, idle ttl
+# Returns the seconds to wait before sending (as a string; Lua numbers are truncated to integers).
+# The token is reserved even when the caller has to wait, so waiting callers are served in order.
+_ACQUIRE = """
+local now = tonumber(ARGV[3])
+local blocked = tonumber(redis.call('GET', KEYS[3]) or 0)
+if blocked > now then
+    return tostring(-(blocked - now))
+end
+local strikes = math.min(tonumber(redis.call('GET', KEYS[2]) or 0), %d)
+local rate = tonumber(ARGV[1]) / math.pow(2, strikes)
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+""" % MAX_STRIKES
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _keys(name):
+    return f"rl:{name}:tokens", f"rl:{name}:strikes", f"rl:{name}:block"
+
+
+class LocalBuckets:
+    """In-process equivalent of the Redis script, used while Redis is unavailable."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}    # name -> [tokens, ts]
+        self._strikes = {}  # name -> (count, expires)
+        self._blocked = {}  # name -> until
+
+    def acquire(self, name, rate, burst, now):
+        with self._lock:
+            blocked = self._blocked.get(name, 0)
+            if blocked > now:
+                return -(blocked - now)
+            rate = rate / 2 ** min(self._strike_count(name, now), MAX_STRIKES)
+            tokens, ts = self._state.get(name, (burst, now))
+            tokens = min(burst, tokens + max(0, now - ts) * rate) - 1
+            self._state[name] = [tokens, now]
+            return 0 if tokens >= 0 else -tokens / rate
+
+    def strike(self, name, window, now):
+        with self._lock:
+            count = self._strike_count(name, now) + 1
+            self._strikes[name] = (count, now + window)
+            return count
+
+    def block(self, name, until):
+        with self._lock:
+            self._blocked[name] = max(self._blocked.get(name, 0), until)
+
+    def _strike_count(self, name, now):
+        count, expires = self._strikes.get(name, (0, 0))
+        return count if expires > now else 0
+
+
+class RateLimiter:
+    def __init__(self, url=None):
+        self.rate = _setting("SCANNER_RATE_LIMIT", 5.0)
+        self.burst = _setting("SCANNER_RATE_LIMIT_BURST", 10)
+        self.by_ip = _setting("SCANNER_RATE_LIMIT_BY_IP", False)
+        self.backoff = _setting("SCANNER_RATE_LIMIT_BACKOFF", 1.0)
+        self.max_backoff = _setting("SCANNER_RATE_LIMIT_MAX_BACKOFF", 120)
+        self.window = _setting("SCANNER_RATE_LIMIT_STRIKE_WINDOW", 300)
+        self._redis = redis.Redis.from_url(
+            url or _setting("SCANNER_RATE_LIMIT_REDIS_URL", "redis://127.0.0.1:6379/1"),
+            socket_connect_timeout=1, socket_timeout=1,
+        )
+        self._redis_down_until = 0.0
+        self._script = self._redis.register_script(_ACQUIRE)
+        self._local = LocalBuckets()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def names(self, url: str) -> list:
+        """Bucket names a request to `url` draws from: its host, plus its IP when enabled."""
+        host = (urlsplit(url).hostname or "").lower()
+        names = [f"host:{host}"]
+        if self.by_ip:
+            ip = self._resolve(host)
+            if ip:
+                names.append(f"ip:{ip}")
+        return names
+
+    def acquire(self, url: str):
+        """Block (cancel-aware) until a request to `url` is allowed."""
+        if not self.enabled:
+            return
+        for name in self.names(url):
+            while True:
+                wait = self._acquire(name)
+                if wait == 0:
+                    break
+                _sleep(abs(wait))
+                if wait > 0:
+                    break  # token reserved; our turn has come
+
+    def penalize(self, url: str, retry_after=None):
+        """Record a 429/503 from `url`: lower the rate and block until the backoff has passed."""
+        if not self.enabled:
+            return
+        now = time.time()
+        for name in self.names(url):
+            strikes = self._strike(name, now)
+            delay = _parse_retry_after(retry_after, now)
+            if delay is None:
+                delay = self.backoff * 2 ** (min(strikes, MAX_STRIKES) - 1)
+            self._block(name, now + min(delay, self.max_backoff))
+
+    def _acquire(self, name):
+        now = time.time()
+        ttl = int(self.burst / self.rate) + self.window
+        return self._call(
+            lambda: float(self._script(keys=_keys(name), args=[self.rate, self.burst, now, ttl])),
+            lambda: self._local.acquire(name, self.rate, self.burst, now),
+        )
+
+    def _strike(self, name, now):
+        _, strikes_key, _ = _keys(name)
+
+        def shared():
+            pipe = self._redis.pipeline()
+            pipe.incr(strikes_key)
+            pipe.expire(strikes_key, self.window)
+            return pipe.execute()[0]
+
+        return self._call(shared, lambda: self._local.strike(name, self.window, now))
+
+    def _block(self, name, until):
+        _, _, block_key = _keys(name)
+
+        def shared():
+            if until > float(self._redis.get(block_key) or 0):
+                self._redis.set(block_key, until, exat=int(until) + 1)
+
+        self._call(shared, lambda: self._local.block(name, until))
+
+    def _call(self, shared, local):
+        """Run against Redis; on error use the local buckets and leave Redis alone for a while."""
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                return shared()
+            except redis.RedisError as e:
+                print(f"Rate limit error: {e}")
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        return local()
+
+    def _resolve(self, host):
+        # Cached for the records' TTL; None when the DNS stage has no answer
+        found = resolver.addresses(host)
+        return found[0] if found else None
+
+
+def _sleep(seconds):
+    token = current_token()
+    if token is not None:
+        token.wait(seconds)
+        raise_if_cancelled()
+    else:
+        time.sleep(seconds)
+
+
+def _parse_retry_after(value, now):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    """Process-wide limiter, created lazily so each forked Celery worker gets its own connection."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
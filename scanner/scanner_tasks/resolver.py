@@ -0,0 +1,156 @@
+# scanner/scanner_tasks/resolver.py
+# scanner_tasks/resolver.py
+"""
+DNS stage of the scan engine.
+
+A target's A/AAAA records (and the CNAME chain leading to them) are resolved
+once with dnspython and cached for the records' TTL, both in-process and in
+the shared cache (Redis), so the checks of a scan, the heavy workers and the
+other scans of a bulk batch don't resolve the same host again.
+
+The addresses feed the transports: HTTP connections (sessions.py) and the TLS
+handshake connect to the cached addresses while still sending the hostname for
+SNI and Host, and nmap is pointed at the resolved IP. The engine calls
+preflight() before planning so a domain that doesn't exist fails fast.
+
+Only definitive answers are cached. Timeouts and unreachable nameservers return
+None and the caller falls back to the system resolver.
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+
+import dns.exception
+import dns.resolver
+from django.conf import settings
+from django.core.cache import cache
+
+
+class Unresolvable(Exception):
+    """The domain does not exist or has no A/AAAA records."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _key(host):
+    return f"dns:{host}"
+
+
+_lock = threading.Lock()
+_local = {}  # host -> entry ({"addresses", "cnames", "expires"}), oldest stored first
+
+
+def _query(host):
+    """Entry for `host` from DNS, None when the answer couldn't be obtained."""
+    try:
+        resolver = dns.resolver.Resolver()
+    except dns.exception.DNSException as e:
+        # e.g. NoResolverConfiguration: no usable resolv.conf on this worker
+        print(f"DNS error ({host}): {e}")
+        return None
+    lifetime = _setting("SCANNER_DNS_TIMEOUT", 5)
+    addresses, cnames, ttls, missing = [], [], [], 0
+    for rdtype in ("A", "AAAA"):
+        try:
+            answer = resolver.resolve(host, rdtype, lifetime=lifetime)
+        except dns.resolver.NXDOMAIN:
+            return {"addresses": [], "cnames": [], "ttl": _setting("SCANNER_DNS_NEGATIVE_TTL", 60)}
+        except dns.resolver.NoAnswer:
+            missing += 1
+            continue
+        except dns.exception.DNSException as e:
+            print(f"DNS error ({host} {rdtype}): {e}")
+            return None
+        addresses.extend(rr.address for rr in answer)
+        ttls.append(answer.rrset.ttl)
+        if not cnames:
+            cnames = [str(rr.target).rstrip(".") for rrset in answer.chaining_result.cnames for rr in rrset]
+
+    if missing == 2:
+        return {"addresses": [], "cnames": cnames, "ttl": _setting("SCANNER_DNS_NEGATIVE_TTL", 60)}
+    ttl = min(max(min(ttls), _setting("SCANNER_DNS_MIN_TTL", 30)), _setting("SCANNER_DNS_MAX_TTL", 3600))
+    return {"addresses": addresses, "cnames": cnames, "ttl": ttl}
+
+
+def lookup(host: str) -> dict | None:
+    """
+    {"addresses": [...], "cnames": [...], "expires": ts} for `host`, from the
+    process cache, the shared cache or DNS, in that order. An empty address
+    list means the name doesn't resolve. None when DNS couldn't answer.
+    """
+    host = host.lower().rstrip(".")
+    now = time.time()
+    with _lock:
+        entry = _local.get(host)
+    if entry and entry["expires"] > now:
+        return entry
+
+    try:
+        entry = cache.get(_key(host))
+    except Exception as e:
+        print(f"DNS cache error: {e}")
+        entry = None
+
+    if not entry or entry["expires"] <= now:
+        found = _query(host)
+        if found is None:
+            return None
+        entry = {"addresses": found["addresses"], "cnames": found["cnames"], "expires": now + found["ttl"]}
+        try:
+            cache.set(_key(host), entry, timeout=int(found["ttl"]))
+        except Exception as e:
+            print(f"DNS cache error: {e}")
+
+    with _lock:
+        _local.pop(host, None)
+        _local[host] = entry
+        max_hosts = _setting("SCANNER_DNS_MAX_HOSTS", 1024)
+        if len(_local) > max_hosts:
+            for stale in [h for h, e in _local.items() if e["expires"] <= now]:
+                del _local[stale]
+        while len(_local) > max_hosts:
+            del _local[next(iter(_local))]
+    return entry
+
+
+def addresses(host: str) -> list:
+    """Addresses to connect to for `host`: the host itself for IP literals, [] to use the system resolver."""
+    try:
+        ipaddress.ip_address(host)
+        return [host]
+    except ValueError:
+        pass
+    if not _setting("SCANNER_DNS_CACHE", True):
+        return []
+    entry = lookup(host)
+    return entry["addresses"] if entry else []
+
+
+def preflight(domain: str) -> dict | None:
+    """Resolve the scan target up front; raises Unresolvable if it doesn't exist."""
+    try:
+        ipaddress.ip_address(domain)
+        return {"addresses": [domain], "cnames": []}
+    except ValueError:
+        pass
+    entry = lookup(domain)
+    if entry is not None and not entry["addresses"]:
+        raise Unresolvable(f"{domain} does not resolve")
+    return entry
+
+
+def create_connection(host: str, port: int, timeout=None) -> socket.socket:
+    """socket.create_connection() over the cached addresses, trying each in turn."""
+    last_error = None
+    for address in addresses(host):
+        try:
+            return socket.create_connection((address, port), timeout=timeout)
+        except OSError as e:
+            last_error = e
+    if last_error is not None:
+        raise last_error
+    return socket.create_connection((host, port), timeout=timeout)
@@ -0,0 +1,220 @@
+# scanner/scanner_tasks/sessions.py
+# scanner_tasks/sessions.py
+"""
+Keep-alive HTTP sessions shared by every check in a worker process.
+
+One requests.Session per target host, so all checks of a scan (and later
+scans of the same host on the same worker) reuse pooled TCP/TLS connections
+instead of handshaking on every request. Timeout, TLS verification, pool size
+and retry/backoff policy come from settings (SCANNER_HTTP_*).
+
+Bodies are streamed and capped at SCANNER_HTTP_MAX_BODY decoded bytes (a
+response.truncated flag is set when the cap cut them short); responses whose
+Content-Type is not one the caller accepts are not downloaded at all
+(response.content_rejected).
+
+Connections go to the addresses cached by the DNS stage (resolver.py); the
+hostname is still used for SNI, certificate checks and the Host header.
+
+Every request first takes a token from the target's shared rate limit bucket
+(rate_limit.py). 429/503 responses are retried against that bucket, which has
+just been slowed down, rather than by urllib3's own backoff.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
+
+from . import resolver
+from .rate_limit import BACKOFF_STATUSES, get_limiter
+from .timing import record_request
+
+
+# Content types the checks can read; anything else (media, archives, binaries) is skipped unread
+TEXT_CONTENT_TYPES = ("text/", "html", "xml", "json", "javascript")
+
+CHUNK_SIZE = 64 * 1024
+_CHARSET = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def read_body(response, max_bytes: int, content_types=TEXT_CONTENT_TYPES):
+    """
+    Consume a streamed response into response.content, at most `max_bytes` of it.
+
+    iter_content() undoes Content-Encoding chunk by chunk, so the cap bounds the
+    decompressed size and a compressed bomb can't expand past it. The text
+    encoding is taken from the Content-Type charset (UTF-8 otherwise) instead of
+    running charset detection over the whole body.
+    """
+    response.truncated = False
+    response.content_rejected = False
+    ctype = response.headers.get("Content-Type", "").lower()
+    if content_types and ctype and not any(t in ctype for t in content_types):
+        response.content_rejected = True
+        response._content = b""
+        response.close()
+        return response
+
+    body = bytearray()
+    for chunk in response.iter_content(CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_bytes:
+            del body[max_bytes:]
+            response.truncated = True
+            break
+    response._content = bytes(body)
+    response.close()
+
+    m = _CHARSET.search(ctype)
+    response.encoding = m.group(1) if m else "utf-8"
+    return response
+
+
+class _ResolvedConnectionMixin:
+    """Connect to the DNS stage's cached addresses, trying each until one answers."""
+
+    def _new_conn(self):
+        host = self._dns_host
+        addresses = resolver.addresses(host)
+        if not addresses:
+            return super()._new_conn()
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError:  # NewConnectionError included
+                    continue
+            self._dns_host = addresses[-1]
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+
+class ResolvedHTTPConnection(_ResolvedConnectionMixin, HTTPConnection):
+    pass
+
+
+class ResolvedHTTPSConnection(_ResolvedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class ResolvedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = ResolvedHTTPConnection
+
+
+class ResolvedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = ResolvedHTTPSConnection
+
+
+class ResolvedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": ResolvedHTTPConnectionPool,
+            "https": ResolvedHTTPSConnectionPool,
+        }
+
+
+class SessionPool:
+    """LRU of per-host sessions; least recently used hosts are closed past `max_hosts`."""
+
+    def __init__(self, pool_size=None, retries=None, backoff=None, max_hosts=None):
+        self.pool_size = pool_size or _setting("SCANNER_HTTP_POOL_SIZE", 10)
+        self.retries = _setting("SCANNER_HTTP_RETRIES", 2) if retries is None else retries
+        self.backoff = _setting("SCANNER_HTTP_BACKOFF", 0.5) if backoff is None else backoff
+        self.max_hosts = max_hosts or _setting("SCANNER_HTTP_MAX_HOSTS", 256)
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def _build(self):
+        session = requests.Session()
+        # Stateless: never replay cookies set by a target into later checks
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        retry = Retry(
+            total=self.retries,
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=(502, 504),  # 429/503 are retried through the rate limiter
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = ResolvedAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = self._build()
+                while len(self._sessions) > self.max_hosts:
+                    _, evicted = self._sessions.popitem(last=False)
+                    evicted.close()
+            else:
+                self._sessions.move_to_end(host)
+            return session
+
+    def request(self, method: str, url: str, timeout=None, content_types=TEXT_CONTENT_TYPES, **kwargs):
+        kwargs.setdefault("verify", _setting("SCANNER_HTTP_VERIFY", True))
+        timeout = timeout or _setting("SCANNER_HTTP_TIMEOUT", 10)
+        response = self.get(url).request(method, url, timeout=timeout, stream=True, **kwargs)
+        return read_body(response, _setting("SCANNER_HTTP_MAX_BODY", 2_000_000), content_types)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> SessionPool:
+    """Process-wide pool, created lazily so each forked Celery worker gets its own."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SessionPool()
+    return _pool
+
+
+def request(method: str, url: str, **kwargs):
+    limiter = get_limiter()
+    retries = _setting("SCANNER_HTTP_RETRIES", 2)
+    for attempt in range(retries + 1):
+        limiter.acquire(url)
+        started = time.monotonic()
+        try:
+            response = get_pool().request(method, url, **kwargs)
+        except Exception:
+            record_request(time.monotonic() - started, 0)
+            raise
+        record_request(time.monotonic() - started, len(response.content))
+        if response.status_code not in BACKOFF_STATUSES:
+            break
+        limiter.penalize(url, response.headers.get("Retry-After"))
+        if attempt < retries:
+            response.close()
+    return response
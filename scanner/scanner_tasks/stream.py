@@ -0,0 +1,34 @@
+# scanner/scanner_tasks/stream.py
+# scanner_tasks/stream.py
+"""
+Live output from long-running checks.
+
+A check that streams (nikto, nmap) calls emit() as its tool prints progress or
+finds something. Whoever runs the check installs a sink with stream_scope();
+without one, emit() is a no-op, so checks behave the same when run inline.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+_current_sink = contextvars.ContextVar("scan_stream_sink", default=None)
+
+
+@contextmanager
+def stream_scope(sink):
+    """Route emit() calls in this context to sink(percent=..., vulnerability=...)."""
+    token = _current_sink.set(sink)
+    try:
+        yield
+    finally:
+        _current_sink.reset(token)
+
+
+def emit(percent=None, vulnerability=None):
+    sink = _current_sink.get()
+    if sink is None:
+        return
+    try:
+        sink(percent=percent, vulnerability=vulnerability)
+    except Exception as e:
+        print(f"Stream sink error: {e}")
@@ -0,0 +1,156 @@
+# scanner/scanner_tasks/timing.py
+# scanner_tasks/timing.py
+"""
+Per-check timing.
+
+Inside `timing_scope()` every check (and every shared probe, as
+"probe:<name>") runs under `measure(name)`, which records its wall time. The
+transport reports each HTTP request through `record_request()`, adding its
+duration, body size and count to the check that issued it. That includes
+threads the check starts with a copied context, like the crawler's. A
+request or probe that raised while the check waited on it is counted in
+`failures` through `record_failure()`, and so is a probe it read whose own
+requests failed, even if the probe recovered from them (see probes.get_probe).
+
+The scan engine stores the snapshot on ScanResult.check_metrics, and
+latency_distribution() turns many of them into per-check percentiles for the
+admin latency report.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("check_timing", default=None)
+_scope = contextvars.ContextVar("scan_timings", default=None)
+_counters = contextvars.ContextVar("failure_counters", default=())
+
+
+class CheckTiming:
+    __slots__ = ("started", "wall", "network", "bytes", "requests", "failures", "_lock")
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.wall = None  # seconds; None while the check is still running
+        self.network = 0.0
+        self.bytes = 0
+        self.requests = 0
+        self.failures = 0  # requests/probes that raised (connection errors, timeouts)
+        self._lock = threading.Lock()
+
+    def add_request(self, elapsed: float, nbytes: int):
+        with self._lock:
+            self.network += elapsed
+            self.bytes += nbytes
+            self.requests += 1
+
+    def add_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def stop(self):
+        self.wall = time.monotonic() - self.started
+
+    def as_dict(self) -> dict:
+        wall = self.wall if self.wall is not None else time.monotonic() - self.started
+        data = {
+            "wall_ms": round(wall * 1000),
+            "network_ms": round(self.network * 1000),
+            "bytes": self.bytes,
+            "requests": self.requests,
+        }
+        if self.wall is None:
+            data["unfinished"] = True  # timed out or abandoned on cancel
+        return data
+
+
+@contextmanager
+def timing_scope():
+    """Collect the timings of every check measured inside the block ({name: CheckTiming})."""
+    token = _scope.set({})
+    try:
+        yield _scope.get()
+    finally:
+        _scope.reset(token)
+
+
+@contextmanager
+def measure(name: str):
+    """Time the enclosed check or probe; a no-op outside a timing_scope()."""
+    timings = _scope.get()
+    if timings is None:
+        yield None
+        return
+    timing = timings[name] = CheckTiming()
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        timing.stop()
+        _current.reset(token)
+
+
+def record_request(elapsed: float, nbytes: int):
+    timing = _current.get()
+    if timing is not None:
+        timing.add_request(elapsed, nbytes)
+
+
+def record_failure():
+    timing = _current.get()
+    if timing is not None:
+        timing.add_failure()
+    for counter in _counters.get():
+        counter[0] += 1
+
+
+@contextmanager
+def count_failures():
+    """Count the failures recorded inside the block, threads started from it included; yields [count]."""
+    counter = [0]
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+
+
+def snapshot(timings: dict) -> dict:
+    return {name: timing.as_dict() for name, timing in timings.items()}
+
+
+def _percentile(ordered, pct):
+    # Nearest rank
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+
+def latency_distribution(rows) -> list:
+    """
+    Per-check latency across scans, slowest p90 first.
+    `rows` is an iterable of ScanResult.check_metrics dicts.
+    """
+    samples = {}
+    for metrics in rows:
+        for name, m in (metrics or {}).items():
+            if "wall_ms" in m:
+                samples.setdefault(name, []).append(m)
+
+    report = []
+    for name, entries in samples.items():
+        walls = sorted(m["wall_ms"] for m in entries)
+        total_wall = sum(walls) or 1
+        report.append({
+            "name": name,
+            "count": len(entries),
+            "p50_ms": _percentile(walls, 50),
+            "p90_ms": _percentile(walls, 90),
+            "p99_ms": _percentile(walls, 99),
+            "max_ms": walls[-1],
+            "network_pct": round(100 * sum(m["network_ms"] for m in entries) / total_wall),
+            "avg_bytes": sum(m["bytes"] for m in entries) // len(entries),
+            "avg_requests": round(sum(m["requests"] for m in entries) / len(entries), 1),
+            "unfinished": sum(1 for m in entries if m.get("unfinished")),
+        })
+    report.sort(key=lambda r: r["p90_ms"], reverse=True)
+    return report
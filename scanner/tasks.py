@@ -2,93 +2,66 @@
 
 from .models import ScanResult
 from django.utils import timezone
-import time
 import random
+import time
 import requests
 import urllib3
-from celery import shared_task
+from celery import chord, shared_task
+from celery.result import AsyncResult
+from celery.utils import uuid
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from django.contrib.messages import get_messages
 from django.contrib.sessions.models import Session
 
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Value
+
+from core.fields import COMPRESSED_PREFIX, Sealed
+from reports.tasks import queue_report_build
+from .batch import TERMINAL_STATUSES, batch_scan_finished, fill_batch_slots, release_slot
+from .cancellation import CancelWatcher, is_cancel_requested
+from .checkpoint import LeaseKeeper, clear_checkpoints, lease_deadline, load_checkpoints, save_checkpoint
+from .executor import get_executor
+from .findings import write_findings
+from .scanner_tasks.cancel import cancel_scope
+from .progress import ProgressPublisher, count_completed
+from .scanner_tasks.fetch import scan_scope
 from .scanner_tasks.helpers import connect_to_external_scanner
-from .scanner_tasks.gdpr import (
-    check_gdpr_dsar, check_gdpr_dpia, check_gdpr_retention, check_gdpr_dpo,
-    crawl_sitemap, check_cookies, check_privacy_policy
-)
-from .scanner_tasks.owasp import (
-    check_broken_access_control, check_crypto_failures, check_sql_injection,
-    check_missing_security_headers, check_security_misconfig, check_outdated_software,
-    check_auth_failures, check_integrity_failures, check_logging_monitoring, check_ssrf,
-    run_nikto_scan
-)
-from .scanner_tasks.iso27001 import check_iso27001_access_control
-from .scanner_tasks.pcidss import check_pci_dss_logging
-from .scanner_tasks.hipaa import check_hipaa_encryption, check_forms
-from .scanner_tasks.soc2 import check_soc2_access_reviews
-from .scanner_tasks.cis import check_cis_benchmark_1_4
-from .scanner_tasks.nist import check_third_party_scripts, run_nmap_vuln_scan
-from .scanner_tasks.encryption import check_ssl_tls
-
-
-# === TIERS (same as before) ===
-gdpr_tests = [
-    ("GDPR: DSAR", check_gdpr_dsar),
-    ("GDPR: DPIA", check_gdpr_dpia),
-    ("GDPR: Retention", check_gdpr_retention),
-    ("GDPR: DPO", check_gdpr_dpo),
-    ("Sitemap & Robots", crawl_sitemap),
-    ("Cookie Consent", check_cookies),
-    ("Privacy Policy", check_privacy_policy),
-]
-
-owasp_tests = [
-    ("OWASP A01: Access Control", check_broken_access_control),
-    ("OWASP A02: Crypto", check_crypto_failures),
-    ("OWASP A03: Injection", check_sql_injection),
-    ("OWASP A04: Headers", check_missing_security_headers),
-    ("OWASP A05: Misconfig", check_security_misconfig),
-    ("OWASP A06: Outdated", check_outdated_software),
-    ("OWASP A07: Auth", check_auth_failures),
-    ("OWASP A08: Integrity", check_integrity_failures),
-    ("OWASP A09: Logging", check_logging_monitoring),
-    ("OWASP A10: SSRF", check_ssrf),
-    ("Nikto Scan", run_nikto_scan),
-]
-
-basic_security_tests = [
-    ("SSL/TLS Check", check_ssl_tls),
-    ("Third-Party Scripts", check_third_party_scripts),
-]
-
-iso27001_tests = [("ISO 27001 Access", check_iso27001_access_control)]
-pcidss_tests = [("PCI DSS Headers", check_pci_dss_logging)]
-hipaa_tests = [("HIPAA Encryption", check_hipaa_encryption), ("HIPAA Forms", check_forms)]
-soc2_tests = [("SOC 2 Access", check_soc2_access_reviews)]
-cis_tests = [("CIS Lockout", check_cis_benchmark_1_4)]
-nmap_tests = [("Nmap Vuln Scan", run_nmap_vuln_scan)]
-
-FREE_TESTS = gdpr_tests + owasp_tests[:7] + basic_security_tests
-PRO_TESTS = FREE_TESTS + owasp_tests[7:] + iso27001_tests + pcidss_tests
-ENTERPRISE_TESTS = PRO_TESTS + hipaa_tests + soc2_tests + cis_tests + nmap_tests
-#FREE_TESTS=ENTERPRISE_TESTS
-
-TIERS = {
-    "free": FREE_TESTS,
-    "pro": PRO_TESTS,
-    "enterprise": ENTERPRISE_TESTS,
-}
+from .scanner_tasks.probes import start_probes
+from .scanner_tasks.resolver import Unresolvable, preflight
+from .scanner_tasks.stream import stream_scope
+from .scanner_tasks.timing import snapshot, timing_scope
+from .registry import CHECKS_BY_NAME, TIERS, cost_summary, shard
+from .result_cache import get_reusable, normalize_domain, store_results
 
 
 @shared_task(bind=True)
 def run_compliance_scan(self, scan_id):
     try:
-        scan = ScanResult.objects.select_for_update().get(pk=scan_id)
+        scan = ScanResult.objects.get(pk=scan_id)
     except ScanResult.DoesNotExist:
         return "Scan not found"
 
-    domain = scan.domain.strip().lower().replace("https://", "").replace("http://", "").split("/")[0]
+    # Cancelled while still queued: don't take the worker slot
+    if scan.status == 'CANCELLED' or is_cancel_requested(scan.scan_id):
+        return "Scan cancelled"
+
+    domain = normalize_domain(scan.domain)
+
+    # DNS stage: resolved once and cached for the TTL; a domain that doesn't exist stops here
+    log_buffer = [f"[{timezone.now():%H:%M:%S}] Scan started → {domain}"]
+    try:
+        dns_entry = preflight(domain)
+    except Unresolvable as e:
+        log_buffer.append(f"[{timezone.now():%H:%M:%S}] [FAILED] DNS: {e}")
+        return _finalize_failed(scan, log_buffer, "Domain does not resolve")
+    if dns_entry:
+        via = f" via {' → '.join(dns_entry['cnames'])}" if dns_entry["cnames"] else ""
+        log_buffer.append(f"[{timezone.now():%H:%M:%S}] DNS: {', '.join(dns_entry['addresses'][:4])}{via}")
 
     # Get user tier
     try:
@@ -96,54 +69,484 @@ def run_compliance_scan(self, scan_id):
     except:
         user_tier = 'free'
 
-    selected_tests = TIERS.get(user_tier, FREE_TESTS)
+    selected_tests = TIERS.get(user_tier, TIERS["free"])
 
-    # Initialize
+    # Fresh results from an earlier scan of this domain are reused, not re-fetched
+    reused = get_reusable(domain, selected_tests)
+    to_run = [c for c in selected_tests if c.name not in reused]
+
+    # nikto/nmap go to their own queue and worker pool; everything else runs here
+    heavy_queue = getattr(settings, "SCANNER_HEAVY_QUEUE", "heavy")
+    deferred = [c for c in to_run if c.heavy] if heavy_queue else []
+    inline = [c for c in to_run if c not in deferred]
+
+    # Use a list to collect logs → write only 2–3 times total
+    log_buffer[0] += f" ({user_tier.capitalize()} Tier)"
+    plan_summary = ", ".join(f"{n} {cost}" for cost, n in cost_summary(selected_tests).items())
+    log_buffer.append(f"[{timezone.now():%H:%M:%S}] Plan: {len(selected_tests)} checks ({plan_summary})")
+    for name, entry in reused.items():
+        age = int((time.time() - entry["stored_at"]) // 60)
+        status = entry["result"].get("status", "error").upper()
+        log_buffer.append(f"[{timezone.now():%H:%M:%S}] [REUSED] {name}: {status} (result from {age} min ago)")
+    if deferred:
+        log_buffer.append(f"[{timezone.now():%H:%M:%S}] Queued on '{heavy_queue}': {', '.join(c.name for c in deferred)}")
+
+    # Optional: spread the fast checks over several workers and merge them in a chord callback
+    shards = []
+    if user_tier in getattr(settings, "SCANNER_SHARD_TIERS", ["enterprise"]):
+        shards = shard(inline, getattr(settings, "SCANNER_SHARDS", 0))
+    if len(shards) > 1:
+        log_buffer.append(f"[{timezone.now():%H:%M:%S}] Sharded: {len(inline)} checks over {len(shards)} workers")
+
+    # Per-check results are merged into raw_data as they arrive; the last one in finalizes
+    external_results = connect_to_external_scanner(domain)
+    heavy_tasks = {c.name: uuid() for c in deferred}  # task ids, so the reaper can tell queued from lost
+    scan.set_raw_data({
+        "plan": [c.name for c in selected_tests],
+        "results": {name: entry["result"] for name, entry in reused.items()},
+        "pending": [c.name for c in deferred],
+        "heavy_tasks": heavy_tasks,
+        "heavy_queued_at": {name: time.time() for name in heavy_tasks},
+        "external": external_results,
+    })
+
+    # Initialize (DB milestone: start)
     scan.status = 'RUNNING'
     scan.progress = 0
     scan.current_step = "Starting scan..."
-    #scan.scan_log = f"[{timezone.now():%H:%M:%S}] Scan started for {domain}\n"
-    #scan.save(update_fields=['status', 'progress', 'current_step'])
-    scan.save(update_fields=['status', 'progress', 'current_step', 'scan_log'])
+    scan.scan_log = "\n".join(log_buffer)
+    # Shards wait in the queue before anything heartbeats; inline work renews the lease itself
+    scan.lease_expires_at = lease_deadline(queued=len(shards) > 1)
+    scan.save(update_fields=['status', 'progress', 'current_step', 'scan_log', '_raw_data', 'lease_expires_at'])
+    logged = len(log_buffer)
 
-    # Use a list to collect logs → write only 2–3 times total
-    log_buffer = [f"[{timezone.now():%H:%M:%S}] Scan started → {domain} ({user_tier.capitalize()} Tier)"]
-
-    channel_layer = get_channel_layer()
-    raw_data = {
-        "findings": [],
-        "recommendations": [],
-        "scanned_urls": 0,
-        "issues_found": 0,
-        "vulnerabilities": []
-    }
-    findings, breach_alerts, checklist = [], [], {}
+    for name, task_id in heavy_tasks.items():
+        run_heavy_check.apply_async(args=[scan.pk, name, domain], queue=heavy_queue, task_id=task_id)
 
     total_tests = len(selected_tests)
     progress_per_test = 90 / max(total_tests, 1)
 
-    # === Run Tests ===
-    external_results = connect_to_external_scanner(domain)
-    _update_scan(scan, progress=1, step="Scan Started...", log_buffer=log_buffer)
+    if len(shards) > 1:
+        chord(
+            run_scan_shard.s(scan.pk, domain, [c.name for c in group], total_tests, len(reused))
+            for group in shards
+        )(merge_scan_shards.s(scan.pk))
+        return f"Sharded into {len(shards)}"
 
-    for idx, (test_name, test_func) in enumerate(selected_tests):
-        progress = min(95, 5 + int((idx + 1) * progress_per_test))
+    # === Run Tests ===
+    # Live progress goes to Redis/WS (throttled); the DB only sees milestones
+    publisher = ProgressPublisher(scan)
+    publisher.update(1, "Scan Started...")
 
-        _update_scan(scan, progress=progress, step=test_name, log_buffer=log_buffer)
+    completed = len(reused)
 
-        try:
-            result = test_func(domain)
-        except Exception as e:
-            result = {"title": test_name, "status": "error", "details": str(e)}
+    def on_result(idx, test_name, result):
+        nonlocal completed
+        completed += 1
+        progress = min(95, 5 + int(completed * progress_per_test))
 
         # Log result
         status = result.get("status", "error").upper()
         log_buffer.append(f"[{timezone.now():%H:%M:%S}] [{progress}%] {test_name}: {status}")
 
+        publisher.update(progress, test_name)
+
+    results, cancelled, timings = _execute(scan, domain, inline, on_result)
+    if cancelled:
+        return _finalize_cancelled(scan, log_buffer, publisher)
+
+    return _complete_light_phase(
+        scan.pk, {c.name: r for c, r in zip(inline, results)}, log_buffer[logged:], publisher, timings
+    )
+
+
+@shared_task(bind=True)
+def run_scan_shard(self, scan_id, domain, check_names, total_tests, already_done):
+    """Run one shard of a sharded scan; merge_scan_shards receives what it returns."""
+    checks = [CHECKS_BY_NAME[n] for n in check_names if n in CHECKS_BY_NAME]
+    scan = ScanResult.objects.filter(pk=scan_id).first()
+    if scan is None or scan.status != 'RUNNING' or is_cancel_requested(scan.scan_id):
+        return {"results": {}, "log": [], "cancelled": True, "timings": {}}
+
+    publisher = ProgressPublisher(scan)
+    log_lines = []
+
+    def on_result(idx, test_name, result):
+        # Progress is counted across all shards of the scan
+        completed = already_done + count_completed(scan.scan_id)
+        progress = min(95, 5 + int(completed * 90 / max(total_tests, 1)))
+        status = result.get("status", "error").upper()
+        log_lines.append(f"[{timezone.now():%H:%M:%S}] [{progress}%] {test_name}: {status}")
+        publisher.update(progress, test_name)
+
+    results, cancelled, timings = _execute(scan, domain, checks, on_result)
+    publisher.flush()
+    return {
+        "results": {c.name: r for c, r in zip(checks, results)},
+        "log": log_lines,
+        "cancelled": cancelled,
+        "timings": timings,
+    }
+
+
+@shared_task
+def merge_scan_shards(shard_outputs, scan_id):
+    """Chord callback: merge every shard, then grade and finalize the scan unless heavy checks are still out."""
+    results, log_lines, timings = {}, [], {}
+    for output in shard_outputs:
+        results.update(output["results"])
+        log_lines.extend(output["log"])
+        timings.update(output.get("timings", {}))
+
+    scan = ScanResult.objects.get(pk=scan_id)
+    publisher = ProgressPublisher(scan)
+    if any(output["cancelled"] for output in shard_outputs):
+        return _finalize_cancelled(scan, (scan.scan_log or "").splitlines() + log_lines, publisher)
+    return _complete_light_phase(scan_id, results, log_lines, publisher, timings)
+
+
+def _execute(scan, domain, checks, on_result=None):
+    """
+    Run `checks` in this worker. Returns (results in `checks` order, cancelled,
+    per-check timings). Checks run concurrently and share one fetch cache; the
+    watcher trips the cancel token as soon as CancelScanView raises the flag.
+    Each result is checkpointed as it completes and the scan's lease is kept
+    alive meanwhile.
+    """
+    def checkpointed(idx, test_name, result):
+        save_checkpoint(scan.scan_id, test_name, result)
+        if on_result:
+            on_result(idx, test_name, result)
+
+    with scan_scope(), timing_scope() as timings, LeaseKeeper(scan.pk), \
+            CancelWatcher(scan.scan_id) as token, cancel_scope(token):
+        # Shared probes (TLS, headers, homepage) run once, dependencies first
+        start_probes(domain, checks)
+        results = get_executor().run(domain, checks, on_result=checkpointed)
+
+    if not token.cancelled:
+        store_results(domain, checks, results)
+    return results, token.cancelled, snapshot(timings)
+
+
+def _complete_light_phase(scan_pk, results, log_lines, publisher, timings=None):
+    """Merge the fast checks' results; finalize now unless heavy checks are still running."""
+    scan, ready = _merge_results(scan_pk, results, log_lines, light_done=True, timings=timings)
+    if not ready:
+        # Heavy checks still running: their task finalizes the scan
+        step = f"Waiting for {', '.join(scan.raw_data['pending'])}..."
+        publisher.update(scan.progress, step)
+        publisher.flush()
+        return "Waiting for heavy checks"
+
+    publisher.close()
+    _finalize_scan(scan)
+
+
+@shared_task(bind=True, track_started=True)
+def run_heavy_check(self, scan_id, check_name, domain):
+    """Run one subprocess/network-scan check on the heavy queue and merge it into its scan."""
+    check = CHECKS_BY_NAME.get(check_name)
+    try:
+        scan = ScanResult.objects.get(pk=scan_id)
+    except ScanResult.DoesNotExist:
+        return "Scan not found"
+    if check is None or scan.status != 'RUNNING' or is_cancel_requested(scan.scan_id):
+        return _stop_waiting_scan(scan)
+    # A task that waited past SCANNER_HEAVY_QUEUE_MAX_WAIT was requeued under a new id
+    if scan.raw_data.get("heavy_tasks", {}).get(check_name, self.request.id) != self.request.id:
+        return "Superseded"
+
+    # Stream the tool's progress and findings while it runs
+    publisher = ProgressPublisher(scan)
+    found, last_percent = [], None
+
+    def sink(percent=None, vulnerability=None):
+        nonlocal last_percent
+        if percent is not None:
+            last_percent = percent
+        if vulnerability:
+            found.append(vulnerability)
+        step = check.name if last_percent is None else f"{check.name} {last_percent:.0f}%"
+        publisher.update(scan.progress, f"{step} · {len(found)} findings so far", vulnerabilities=found[-20:])
+
+    with scan_scope(), timing_scope() as timings, LeaseKeeper(scan.pk), CancelWatcher(scan.scan_id) as token, \
+            cancel_scope(token), stream_scope(sink):
+        result = get_executor().run(domain, [check])[0]
+
+    if token.cancelled:
+        return _stop_waiting_scan(scan)
+
+    store_results(domain, [check], [result])
+    line = f"[{timezone.now():%H:%M:%S}] {check.name}: {result.get('status', 'error').upper()}"
+    scan, ready = _merge_results(scan_id, {check.name: result}, [line], timings=snapshot(timings))
+    if not ready:
+        state = scan.raw_data
+        publisher.update(scan.progress, f"Waiting for {', '.join(state['pending'])}...")
+        publisher.flush()
+        return "Merged"
+
+    publisher.close()
+    _finalize_scan(scan)
+
+
+@shared_task
+def run_batch_scan(scan_id):
+    """Run one scan of a bulk batch; fill_batch_slots() has already leased it a slot."""
+    if not ScanResult.objects.filter(pk=scan_id, status='PENDING').exists():
+        # Cancelled while queued, or dispatched twice from a stale list of pending scans
+        release_slot(scan_id)
+        fill_batch_slots()
+        return "Skipped"
+    try:
+        outcome = run_compliance_scan(scan_id)
+    except Exception as e:
+        print(f"[Batch scan {scan_id} failed] {e}")
+        scan = ScanResult.objects.filter(pk=scan_id).first()
+        if scan is None:
+            release_slot(scan_id)
+            fill_batch_slots()
+            return "Scan not found"
+        log_buffer = (scan.scan_log or "").splitlines()
+        log_buffer.append(f"[{timezone.now():%H:%M:%S}] [FAILED] {e}")
+        return _finalize_failed(scan, log_buffer, "Failed")
+    # The slot is held until a finalizer runs; a scan that never started gives it back here
+    if not ScanResult.objects.filter(pk=scan_id, status='RUNNING').exists():
+        release_slot(scan_id)
+        fill_batch_slots()
+    return outcome
+
+
+@shared_task
+def reap_expired_scans():
+    """
+    Beat task: hand RUNNING scans whose lease expired (worker died mid-scan) to
+    resume_scan, or fail them after SCANNER_MAX_RESUMES attempts. Scans that
+    only wait on heavy checks still in the queue get a new lease instead. Rows
+    that predate leases are picked up once they are older than the queued lease.
+    """
+    now = timezone.now()
+    legacy_cutoff = now - timedelta(seconds=getattr(settings, "SCANNER_LEASE_QUEUED_TTL", 3600))
+    max_resumes = getattr(settings, "SCANNER_MAX_RESUMES", 3)
+    expired = ScanResult.objects.filter(
+        Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True, scan_date__lt=legacy_cutoff),
+        status='RUNNING',
+    ).only("pk", "lease_expires_at", "resume_count", "_raw_data")
+
+    resumed = 0
+    for scan in expired:
+        pk, lease, resume_count = scan.pk, scan.lease_expires_at, scan.resume_count
+        if _waiting_on_heavy_queue(scan.raw_data):
+            # Nothing was lost, the heavy queue is just backed up: extend the lease, not a resume
+            ScanResult.objects.filter(pk=pk, status='RUNNING', lease_expires_at=lease).update(
+                lease_expires_at=lease_deadline(queued=True)
+            )
+            continue
+        # Claim the scan by moving its lease; a concurrent reaper's update then matches nothing
+        claimed = ScanResult.objects.filter(pk=pk, status='RUNNING', lease_expires_at=lease).update(
+            lease_expires_at=lease_deadline(queued=True), resume_count=F("resume_count") + 1
+        )
+        if not claimed:
+            continue
+        if resume_count >= max_resumes:
+            scan = ScanResult.objects.get(pk=pk)
+            log_buffer = (scan.scan_log or "").splitlines()
+            log_buffer.append(f"[{timezone.now():%H:%M:%S}] [FAILED] Worker lost {resume_count + 1} times")
+            _finalize_failed(scan, log_buffer, "Failed")
+            continue
+        resume_scan.delay(pk)
+        resumed += 1
+    # Slots whose scan died without a finalizer expire on their own; reuse them
+    fill_batch_slots()
+    return f"Resumed {resumed}"
+
+
+@shared_task(bind=True)
+def resume_scan(self, scan_id):
+    """Continue a scan whose worker died: merge its checkpoints and run only the checks that never finished."""
+    scan = ScanResult.objects.filter(pk=scan_id).first()
+    if scan is None or scan.status != 'RUNNING':
+        return "Skipped"
+    state = scan.raw_data
+    log_buffer = (scan.scan_log or "").splitlines()
+    if "plan" not in state:
+        log_buffer.append(f"[{timezone.now():%H:%M:%S}] [FAILED] Worker lost before the scan was planned")
+        return _finalize_failed(scan, log_buffer, "Failed")
+    if is_cancel_requested(scan.scan_id):
+        return _finalize_cancelled(scan, log_buffer, ProgressPublisher(scan))
+    if state.get("finalizing"):
+        # Died while grading: every result is in
+        return _finalize_scan(scan)
+
+    domain = normalize_domain(scan.domain)
+    remaining = [n for n in state["plan"] if n not in state["results"]]
+    restored = load_checkpoints(scan.scan_id, remaining)
+    remaining = [n for n in remaining if n not in restored]
+
+    # Heavy checks whose task was lost go back on their queue, those still queued are left alone;
+    # the rest runs here
+    heavy_queue = getattr(settings, "SCANNER_HEAVY_QUEUE", "heavy")
+    lost = _lost_heavy_checks(state)
+    requeue = {n: uuid() for n in lost if n in remaining}
+    inline = [CHECKS_BY_NAME[n] for n in remaining if n not in state["pending"] and n in CHECKS_BY_NAME]
+
+    line = (f"[{timezone.now():%H:%M:%S}] [RESUMED] Worker lost; "
+            f"{len(state['plan']) - len(remaining)}/{len(state['plan'])} checks already done")
+    _merge_results(scan.pk, restored, [line], heavy_tasks=requeue)
+    for name, task_id in requeue.items():
+        run_heavy_check.apply_async(args=[scan.pk, name, domain], queue=heavy_queue, task_id=task_id)
+
+    publisher = ProgressPublisher(scan)
+    log_lines = []
+
+    def on_result(idx, test_name, result):
+        log_lines.append(f"[{timezone.now():%H:%M:%S}] {test_name}: {result.get('status', 'error').upper()}")
+
+    results, cancelled, timings = _execute(scan, domain, inline, on_result)
+    if cancelled:
+        return _finalize_cancelled(scan, log_buffer + [line] + log_lines, publisher)
+    return _complete_light_phase(
+        scan.pk, {c.name: r for c, r in zip(inline, results)}, log_lines, publisher, timings
+    )
+
+
+@shared_task
+def compress_scan_blobs(batch_size=None):
+    """
+    Rewrite a batch of finished scans whose _raw_data or scan_log still hold
+    uncompressed tokens in the compressed format, then queue the next batch
+    until none are left. Each row is only updated if its column hasn't changed
+    since it was read.
+    """
+    batch_size = batch_size or getattr(settings, "SCANNER_COMPRESS_BATCH", 200)
+    fields = [ScanResult._meta.get_field(name) for name in ("_raw_data", "scan_log")]
+    legacy = Q()
+    for field in fields:
+        legacy |= Q(**{f"{field.name}__gt": ""}) & ~Q(**{f"{field.name}__startswith": COMPRESSED_PREFIX})
+    rows = list(ScanResult.objects.filter(legacy)
+                .exclude(status__in=['PENDING', 'RUNNING'])
+                .order_by('pk')
+                .only('pk', *(field.name for field in fields))[:batch_size])
+
+    rewritten = 0
+    for scan in rows:
+        for field in fields:
+            sealed = scan.__dict__.get(field.attname)  # still sealed: the attribute was never read
+            if not isinstance(sealed, Sealed) or sealed.token.startswith(COMPRESSED_PREFIX):
+                continue
+            # Value() keeps the stored token from being prepared (decrypted) like a lookup value
+            rewritten += ScanResult.objects.filter(pk=scan.pk, **{field.name: Value(sealed.token)}).update(
+                **{field.name: field.unseal(sealed)}
+            )
+    if len(rows) == batch_size:
+        compress_scan_blobs.delay(batch_size)
+    return f"Compressed {rewritten} columns"
+
+
+def _stop_waiting_scan(scan):
+    """
+    A heavy check found its scan cancelled or already over. The scan may have
+    been waiting only on it, so finalize a cancelled scan here and free its
+    batch slot either way.
+    """
+    scan.refresh_from_db(fields=['status', 'progress', 'scan_log'])
+    if scan.status == 'RUNNING' and is_cancel_requested(scan.scan_id):
+        return _finalize_cancelled(scan, (scan.scan_log or "").splitlines(), ProgressPublisher(scan))
+    if scan.status in TERMINAL_STATUSES:
+        batch_scan_finished(scan)
+    return "Skipped"
+
+
+def _lost_heavy_checks(state) -> list:
+    """
+    Pending heavy checks whose task is gone: it failed, was revoked, or started
+    on a worker that stopped renewing the lease. A task Celery still reports as
+    PENDING is waiting in the queue, but PENDING is also all Celery knows about
+    a dropped message, so one queued longer than SCANNER_HEAVY_QUEUE_MAX_WAIT
+    counts as lost too. Scans from before task ids were recorded treat every
+    pending check as lost.
+    """
+    task_ids = state.get("heavy_tasks", {})
+    queued_at = state.get("heavy_queued_at", {})
+    max_wait = getattr(settings, "SCANNER_HEAVY_QUEUE_MAX_WAIT", 4 * 3600)
+    lost = []
+    for name in state.get("pending", []):
+        task_id = task_ids.get(name)
+        if task_id is None or time.time() - queued_at.get(name, 0) > max_wait:
+            lost.append(name)
+            continue
+        try:
+            task_state = AsyncResult(task_id).state
+        except Exception as e:
+            print(f"Heavy task state error: {e}")
+            continue
+        if task_state != 'PENDING':
+            lost.append(name)
+    return lost
+
+
+def _waiting_on_heavy_queue(state) -> bool:
+    """True when only heavy checks remain and each of them is still queued."""
+    return bool(state.get("light_done") and state.get("pending")
+                and not state.get("finalizing") and not _lost_heavy_checks(state))
+
+
+def _merge_results(scan_pk, results, log_lines, light_done=False, timings=None, heavy_tasks=None):
+    """
+    Record finished checks on the locked scan row.
+    Returns (scan, ready); ready is True for exactly one caller, the one that should finalize.
+    """
+    with transaction.atomic():
+        scan = ScanResult.objects.select_for_update().get(pk=scan_pk)
+        state = scan.raw_data
+        state["results"].update(results)
+        state.setdefault("timings", {}).update(timings or {})
+        state.setdefault("heavy_tasks", {}).update(heavy_tasks or {})
+        state.setdefault("heavy_queued_at", {}).update({name: time.time() for name in heavy_tasks or ()})
+        state["pending"] = [n for n in state["pending"] if n not in results]
+        if light_done:
+            state["light_done"] = True
+
+        ready = (scan.status == 'RUNNING' and state.get("light_done")
+                 and not state["pending"] and not state.get("finalizing"))
+        if ready:
+            state["finalizing"] = True
+
+        scan.progress = min(95, 5 + int(len(state["results"]) * 90 / max(len(state["plan"]), 1)))
+        scan.scan_log = "\n".join(((scan.scan_log or "").splitlines() + log_lines)[-100:])
+        scan.lease_expires_at = lease_deadline(queued=bool(state["pending"]))
+        scan.set_raw_data(state)
+        scan.save(update_fields=['_raw_data', 'scan_log', 'progress', 'lease_expires_at'])
+    return scan, ready
+
+
+def _finalize_scan(scan):
+    """Grade the merged per-check results, save the final state and notify the user."""
+    state = scan.raw_data
+    external_results = state.get("external")
+    results = [
+        state["results"].get(name) or {"title": name, "status": "error", "details": "No result"}
+        for name in state["plan"]
+    ]
+
+    raw_data = {
+        "findings": [],
+        "recommendations": [],
+        "scanned_urls": sorted({url for r in results for url in r.get("scanned_urls", ())}),
+        "issues_found": 0,
+        "vulnerabilities": [],
+        # Compact per-check outcome; the full payloads are already in findings/vulnerabilities
+        "checks": {name: {"title": r.get("title"), "status": r.get("status")} for name, r in zip(state["plan"], results)},
+    }
+    breach_alerts, checklist = [], {}
+    finding_checks = []  # (check name, finding) for the ScanFinding table
+
+    for name, result in zip(state["plan"], results):
         # Collect findings
         if not external_results:
             if result.get("status") in ["fail", "warn"]:
                 raw_data["findings"].append(result)
+                finding_checks.append((name, result))
                 if result.get("risk_level") == "high":
                     breach_alerts.append(result["title"])
             if result.get("vulnerabilities"):
@@ -156,10 +559,10 @@ def run_compliance_scan(self, scan_id):
             if "cookie" in title:
                 checklist['cookie_banner'] = result["status"] == "pass"
 
-        time.sleep(0.4)
-
     # === Finalize ===
-    _update_scan(scan, progress=98, step="Generating report...", log_buffer=log_buffer)
+    publisher = ProgressPublisher(scan)
+    publisher.update(98, "Generating report...")
+    publisher.flush()
 
     if external_results:
         scan.grade = external_results.get("grade", "C")
@@ -173,11 +576,13 @@ def run_compliance_scan(self, scan_id):
         scan.risk_score = round(100 - score + random.uniform(1, 4), 1)
 
     # Final log + save
-    log_buffer.append(f"[COMPLETE] Grade: {scan.grade} | Risk: {scan.risk_score}% | Issues: {len(raw_data['findings'])}")
-    scan.scan_log = "\n".join(log_buffer[-100:])  # Keep last 100 lines
+    log_lines = (scan.scan_log or "").splitlines()
+    log_lines.append(f"[COMPLETE] Grade: {scan.grade} | Risk: {scan.risk_score}% | Issues: {len(raw_data['findings'])}")
+    scan.scan_log = "\n".join(log_lines[-100:])  # Keep last 100 lines
     scan.set_raw_data(raw_data)
     scan.set_breach_alerts(breach_alerts)
     scan.set_checklist_status(checklist)
+    scan.check_metrics = state.get("timings", {})
     scan.recommendations = generate_recommendations(raw_data["findings"])
     scan.status = 'COMPLETED'
     scan.completed_at = timezone.now()
@@ -185,6 +590,14 @@ def run_compliance_scan(self, scan_id):
     scan.current_step = "Complete!"
 
     scan.save()
+    publisher.close()
+    clear_checkpoints(scan.scan_id, state["plan"])
+    # The report PDF renders in its own task, off the scan's critical path
+    transaction.on_commit(lambda: queue_report_build(scan.pk))
+    try:
+        write_findings(scan, finding_checks if not external_results else [("", f) for f in raw_data["findings"]])
+    except Exception as e:
+        print(f"Findings error: {e}")
     
     
     # Send beautiful live toast: "abc.com scan completed!"
@@ -195,7 +608,7 @@ def run_compliance_scan(self, scan_id):
                 f"user_{scan.user.id}",
                 {
                     "type": "scan_notification",
-                    "message": f"{domain} scan completed!",
+                    "message": f"{scan.domain} scan completed!",
                     "grade": scan.grade,
                     "risk_score": round(scan.risk_score, 1),
                     "scan_id": scan.id
@@ -206,28 +619,54 @@ def run_compliance_scan(self, scan_id):
     
     # This MUST run regardless of the notification succeeding
     _send_ws_complete(scan)
+    batch_scan_finished(scan)
+
 
+def _finalize_cancelled(scan, log_buffer, publisher):
+    log_buffer.append(f"[{timezone.now():%H:%M:%S}] [CANCELLED] Scan cancelled by user")
+    scan.scan_log = "\n".join(log_buffer[-100:])
+    scan.status = 'CANCELLED'
+    scan.current_step = "Cancelled"
+    scan.save(update_fields=['status', 'current_step', 'scan_log'])
+    publisher.close()
+
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            f"scan_{scan.scan_id}",
+            {
+                "type": "scan_update",
+                "progress": scan.progress,
+                "step": "Scan Cancelled",
+                "status": "CANCELLED",
+            }
+        )
+    except Exception as e:
+        print(f"WS Cancel Error: {e}")
+    batch_scan_finished(scan)
+    return "Scan cancelled"
 
-# === HELPER: Safe update (only 4–6 DB writes total!) ===
-# scanner/tasks.py
 
-def _update_scan(scan, progress, step, log_buffer):
-    scan.progress = progress
+def _finalize_failed(scan, log_buffer, step):
+    scan.scan_log = "\n".join(log_buffer[-100:])
+    scan.status = 'FAILED'
     scan.current_step = step
-    scan.save(update_fields=['progress', 'current_step'])
-    
+    scan.save(update_fields=['status', 'current_step', 'scan_log'])
+
     try:
         async_to_sync(get_channel_layer().group_send)(
-            f"scan_{scan.scan_id}",  # FIX: Use scan_id (UUID), not id (PK)
+            f"scan_{scan.scan_id}",
             {
-                "type": "scan_update", # FIX: Use underscore to match consumer method
-                "progress": progress,
+                "type": "scan_update",
+                "progress": scan.progress,
                 "step": step,
-                "status": "RUNNING"
+                "status": "FAILED",
             }
         )
     except Exception as e:
-        print(f"WS Error: {e}")
+        print(f"WS Fail Error: {e}")
+    batch_scan_finished(scan)
+    return step
+
 
 def _send_ws_complete(scan):
     try:
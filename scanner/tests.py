@@ -1,4 +1,488 @@
 # scanner/tests.py
-from django.test import TestCase
+import dataclasses
+import json
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from encrypted_model_fields.fields import encrypt_str
+
+from core.fields import COMPRESSED_PREFIX, Sealed
+from core.keywords import KeywordMatcher
+from users.models import FirmProfile
+
+from . import tasks
+from .batch import batch_scan_finished, fill_batch_slots
+from .checkpoint import save_checkpoint
+from .executor import AsyncioCheckExecutor, ThreadPoolCheckExecutor
+from .models import ScanResult
+from .registry import CHECKS, COST_ORDER, COST_STATIC, TIERS, Check, checks_for_tier, plan, shard
+from .result_cache import get_reusable, store_results
+from .scanner_tasks.cancel import CancelToken, cancel_scope, current_token, raise_if_cancelled
+from .scanner_tasks.fetch import scan_scope
+from .scanner_tasks.probes import PROBES, get_probe, plan_probes
+from .scanner_tasks.rate_limit import LocalBuckets, RateLimiter, _parse_retry_after
+from .scanner_tasks.timing import measure, record_failure, timing_scope
+from .tasks import compress_scan_blobs
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher({
+            "dsar": ["data subject access", "data subject"],
+            "retention": ["retention", "retain"],
+            "ccpa": ["ccpa"],
+        })
+
+    def test_matches_like_substring_in(self):
+        text = "we retain your data. a data subject access request is answered in 30 days."
+        for keyword in ["data subject access", "data subject", "retention", "retain", "ccpa"]:
+            self.assertEqual(keyword in self.matcher.keywords_in(text), keyword in text, keyword)
+
+    def test_overlapping_keywords_all_reported(self):
+        hits = self.matcher.scan("submit a data subject access request")
+        self.assertEqual(hits, {"dsar": {"data subject access", "data subject"}})
+
+    def test_keyword_shared_by_rules(self):
+        matcher = KeywordMatcher({"a": ["cookie"], "b": ["cookie", "consent"]})
+        self.assertEqual(matcher.scan("cookie settings"), {"a": {"cookie"}, "b": {"cookie"}})
+
+    def test_special_characters_are_literal(self):
+        matcher = KeywordMatcher({"php": ["phpinfo()"], "dot": ["a.b"]})
+        self.assertEqual(matcher.scan("phpinfo() axb"), {"php": {"phpinfo()"}})
+
+    def test_empty_text_and_rules(self):
+        self.assertEqual(self.matcher.scan(""), {})
+        self.assertEqual(KeywordMatcher({}).scan("anything"), {})
+
+
+def _stored(pk, column):
+    """A ScanResult column as written to the database."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {column} FROM scanner_scanresult WHERE id = %s", [pk])
+        return cursor.fetchone()[0]
+
+
+def _firm(name="firm"):
+    user = get_user_model().objects.create(username=name, email=f"{name}@example.test")
+    # bulk_create skips the post_save starter-audit signal, which needs a scan
+    return FirmProfile.objects.bulk_create([
+        FirmProfile(firm_name=name, email=f"{name}@example.test", domain=f"{name}.test", user=user)
+    ])[0]
+
+
+class LazyEncryptedTextFieldTests(TestCase):
+    def setUp(self):
+        self.scan = ScanResult.objects.create(firm=_firm(), domain="example.com")
+        self.scan.breach_alerts = {"leaks": 2}
+        self.scan.save()
+
+    def test_fetched_instances_stay_sealed_until_read(self):
+        scan = ScanResult.objects.get(pk=self.scan.pk)
+        self.assertIsInstance(scan.__dict__["_breach_alerts"], Sealed)
+        self.assertEqual(scan.breach_alerts, {"leaks": 2})
+        self.assertNotIsInstance(scan.__dict__["_breach_alerts"], Sealed)
+
+    def test_unread_value_is_saved_as_the_same_token(self):
+        token = _stored(self.scan.pk, "_breach_alerts")
+        scan = ScanResult.objects.get(pk=self.scan.pk)
+        scan.domain = "example.org"
+        scan.save()
+        self.assertEqual(_stored(self.scan.pk, "_breach_alerts"), token)
+
+    def test_other_reads_decrypt_on_fetch(self):
+        values = ScanResult.objects.filter(pk=self.scan.pk).values_list("_breach_alerts", flat=True)
+        self.assertEqual(json.loads(values[0]), {"leaks": 2})
+        self.assertEqual(ScanResult.objects.listing().get(pk=self.scan.pk).breach_alerts, {"leaks": 2})
+
+    def test_plaintext_is_returned_as_stored(self):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE scanner_scanresult SET _breach_alerts = %s WHERE id = %s",
+                           ['{"legacy": true}', self.scan.pk])
+        self.assertEqual(ScanResult.objects.get(pk=self.scan.pk).breach_alerts, {"legacy": True})
+
+
+class CompressedEncryptedTextFieldTests(TestCase):
+    def setUp(self):
+        self.firm = _firm()
+
+    def _legacy(self, status, log="line 1\nline 2"):
+        """A scan whose columns hold plain EncryptedTextField tokens, as written before compression."""
+        scan = ScanResult.objects.create(firm=self.firm, domain="example.com", status=status)
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE scanner_scanresult SET _raw_data = %s, scan_log = %s WHERE id = %s",
+                           [encrypt_str('{"checks": {}}').decode(), encrypt_str(log).decode(), scan.pk])
+        return scan
+
+    def test_round_trip(self):
+        scan = ScanResult.objects.create(firm=self.firm, domain="example.com", scan_log="x" * 5000)
+        scan.raw_data = {"checks": {"A": {"status": "pass"}}}
+        scan.save()
+        self.assertTrue(_stored(scan.pk, "_raw_data").startswith(COMPRESSED_PREFIX))
+        self.assertLess(len(_stored(scan.pk, "scan_log")), 1000)
+        scan = ScanResult.objects.get(pk=scan.pk)
+        self.assertEqual(scan.raw_data, {"checks": {"A": {"status": "pass"}}})
+        self.assertEqual(scan.scan_log, "x" * 5000)
+
+    def test_reads_uncompressed_tokens(self):
+        scan = self._legacy("COMPLETED")
+        self.assertEqual(ScanResult.objects.get(pk=scan.pk).scan_log, "line 1\nline 2")
+
+    def test_compress_scan_blobs_rewrites_finished_scans_only(self):
+        done, running = self._legacy("COMPLETED"), self._legacy("RUNNING")
+        self.assertEqual(compress_scan_blobs(batch_size=10), "Compressed 2 columns")
+        self.assertTrue(_stored(done.pk, "scan_log").startswith(COMPRESSED_PREFIX))
+        self.assertFalse(_stored(running.pk, "scan_log").startswith(COMPRESSED_PREFIX))
+        scan = ScanResult.objects.get(pk=done.pk)
+        self.assertEqual((scan.raw_data, scan.scan_log), ({"checks": {}}, "line 1\nline 2"))
+        self.assertEqual(compress_scan_blobs(batch_size=10), "Compressed 0 columns")
+
+
+# Tier contents before the registry, as sliced from the hand-kept lists
+GDPR = ["GDPR: DSAR", "GDPR: DPIA", "GDPR: Retention", "GDPR: DPO", "Sitemap & Robots", "Cookie Consent", "Privacy Policy"]
+OWASP = ["OWASP A01: Access Control", "OWASP A02: Crypto", "OWASP A03: Injection", "OWASP A04: Headers",
+         "OWASP A05: Misconfig", "OWASP A06: Outdated", "OWASP A07: Auth", "OWASP A08: Integrity",
+         "OWASP A09: Logging", "OWASP A10: SSRF", "Nikto Scan"]
+FREE = GDPR + OWASP[:7] + ["SSL/TLS Check", "Third-Party Scripts"]
+PRO = FREE + OWASP[7:] + ["ISO 27001 Access", "PCI DSS Headers"]
+ENTERPRISE = PRO + ["HIPAA Encryption", "HIPAA Forms", "SOC 2 Access", "CIS Lockout", "Nmap Vuln Scan"]
+
+
+class RegistryTests(SimpleTestCase):
+    def test_tiers_match_the_old_lists(self):
+        for tier, names in [("free", FREE), ("pro", PRO), ("enterprise", ENTERPRISE)]:
+            self.assertEqual([c.name for c in TIERS[tier]], names, tier)
+
+    def test_unknown_tier_gets_the_free_set(self):
+        self.assertEqual([c.name for c in checks_for_tier("trial")], FREE)
+
+    def test_plan_runs_cheap_checks_first(self):
+        checks = TIERS["enterprise"]
+        costs = [checks[i].cost for i in plan(checks)]
+        self.assertEqual(costs, sorted(costs, key=COST_ORDER.index))
+        self.assertEqual(sorted(plan(checks)), list(range(len(checks))))
+
+    def test_heavy_checks(self):
+        self.assertEqual([c.name for c in CHECKS if c.heavy], ["Nikto Scan", "Nmap Vuln Scan"])
+
+
+class ShardTests(SimpleTestCase):
+    def test_each_probe_runs_in_one_shard(self):
+        checks = [c for c in TIERS["enterprise"] if not c.heavy]
+        shards = shard(checks, 3)
+        self.assertEqual(len(shards), 3)
+        self.assertCountEqual([c.name for s in shards for c in s], [c.name for c in checks])
+        probes = [set(plan_probes(s)) for s in shards]
+        for i, mine in enumerate(probes):
+            for theirs in probes[i + 1:]:
+                self.assertFalse(mine & theirs)
+
+    def test_registry_order_within_a_shard(self):
+        for s in shard(TIERS["enterprise"], 4):
+            self.assertEqual(s, sorted(s, key=CHECKS.index))
+
+    def test_no_more_shards_than_groups(self):
+        self.assertEqual(shard(TIERS["free"], 0), [])
+        self.assertEqual(len(shard(TIERS["free"], 100)), len(shard(TIERS["free"], 1000)))
+
+
+class LocalBucketsTests(SimpleTestCase):
+    def setUp(self):
+        self.buckets = LocalBuckets()
+
+    def test_burst_then_rate(self):
+        waits = [self.buckets.acquire("host:a", 5.0, 3, 100.0) for _ in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 0.2)
+        # Refilled at 5 tokens/s, the reserved token included
+        self.assertEqual(self.buckets.acquire("host:a", 5.0, 3, 101.0), 0)
+
+    def test_buckets_are_independent(self):
+        for _ in range(3):
+            self.buckets.acquire("host:a", 5.0, 3, 100.0)
+        self.assertEqual(self.buckets.acquire("host:b", 5.0, 3, 100.0), 0)
+
+    def test_strikes_halve_the_rate_until_they_expire(self):
+        self.buckets.acquire("host:a", 5.0, 1, 100.0)
+        self.assertEqual(self.buckets.strike("host:a", 300, 100.0), 1)
+        self.assertAlmostEqual(self.buckets.acquire("host:a", 5.0, 1, 100.0), 0.4)
+        self.assertEqual(self.buckets.strike("host:a", 300, 500.0), 1)
+
+    def test_block_reports_the_remaining_time(self):
+        self.buckets.block("host:a", 130.0)
+        self.assertEqual(self.buckets.acquire("host:a", 5.0, 3, 100.0), -30.0)
+        self.assertEqual(self.buckets.acquire("host:a", 5.0, 3, 131.0), 0)
+
+
+@override_settings(SCANNER_RATE_LIMIT=5.0, SCANNER_RATE_LIMIT_BURST=2, SCANNER_RATE_LIMIT_BY_IP=False,
+                   SCANNER_RATE_LIMIT_REDIS_URL="redis://127.0.0.1:1/0")
+class RateLimiterTests(SimpleTestCase):
+    def test_names_by_host(self):
+        self.assertEqual(RateLimiter().names("https://WWW.Example.com/path"), ["host:www.example.com"])
+
+    def test_falls_back_to_local_buckets_without_redis(self):
+        limiter = RateLimiter()
+        self.assertEqual([limiter._acquire("host:a") for _ in range(2)], [0, 0])
+        self.assertGreater(limiter._acquire("host:a"), 0)
+        self.assertGreater(limiter._redis_down_until, 0)
+
+    def test_penalize_honours_retry_after(self):
+        limiter = RateLimiter()
+        limiter.penalize("https://example.com/", retry_after="30")
+        wait = limiter._acquire("host:example.com")
+        self.assertLess(wait, -29)
+        self.assertEqual(limiter._acquire("host:other.com"), 0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(_parse_retry_after("12", 0), 12.0)
+        self.assertEqual(_parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", 40.0), 60.0)
+        self.assertIsNone(_parse_retry_after("soon", 0))
+        self.assertIsNone(_parse_retry_after(None, 0))
+
+
+def _sleeper(seconds, status="pass"):
+    def check(domain):
+        time.sleep(seconds)
+        return {"title": domain, "status": status}
+    return check
+
+
+@override_settings(SCANNER_CHECK_TIMEOUT=5)
+class ExecutorTests(SimpleTestCase):
+    def _run(self, executor, checks):
+        completed = []
+        results = executor.run("example.com", checks, on_result=lambda i, name, r: completed.append(name))
+        return results, completed
+
+    def test_results_in_check_order_callbacks_in_completion_order(self):
+        checks = [Check("slow", _sleeper(0.3), "m", "s"), Check("fast", _sleeper(0), "m", "s", cost=COST_STATIC)]
+        for executor in (ThreadPoolCheckExecutor(), AsyncioCheckExecutor()):
+            results, completed = self._run(executor, checks)
+            self.assertEqual([r["status"] for r in results], ["pass", "pass"])
+            self.assertEqual(completed, ["fast", "slow"])
+
+    def test_each_check_gets_its_own_deadline(self):
+        checks = [Check("stuck", _sleeper(3), "m", "s", timeout=1), Check("ok", _sleeper(0.1), "m", "s")]
+        for executor in (ThreadPoolCheckExecutor(), AsyncioCheckExecutor()):
+            started = time.monotonic()
+            results, _ = self._run(executor, checks)
+            self.assertLess(time.monotonic() - started, 2.5)
+            self.assertEqual(results[0], {"title": "stuck", "status": "error", "details": "Timed out after 1s"})
+            self.assertEqual(results[1]["status"], "pass")
+
+    def test_exceptions_become_errors(self):
+        def broken(domain):
+            raise ValueError("boom")
+        results, _ = self._run(ThreadPoolCheckExecutor(), [Check("broken", broken, "m", "s")])
+        self.assertEqual(results, [{"title": "broken", "status": "error", "details": "boom"}])
+
+
+class ExecutorCancellationTests(SimpleTestCase):
+    def test_cancel_returns_promptly_and_marks_unfinished_checks(self):
+        def cancels(domain):
+            current_token().cancel()
+            return {"title": "first", "status": "pass"}
+
+        def waits(domain):
+            # Stops at its next cancel-aware sleep, like a check between requests
+            current_token().wait(10)
+            raise_if_cancelled()
+            return {"title": "second", "status": "pass"}
+
+        checks = [Check("first", cancels, "m", "s", cost=COST_STATIC), Check("second", waits, "m", "s")]
+        for executor in (ThreadPoolCheckExecutor(), AsyncioCheckExecutor()):
+            with cancel_scope(CancelToken()):
+                started = time.monotonic()
+                results = executor.run("example.com", checks)
+            self.assertLess(time.monotonic() - started, 2)
+            self.assertEqual(results[0]["status"], "pass")
+            self.assertEqual(results[1]["status"], "cancelled")
+
+    def test_checks_not_started_are_skipped(self):
+        token = CancelToken()
+        token.cancel()
+        calls = []
+        with cancel_scope(token):
+            results = ThreadPoolCheckExecutor().run("example.com", [Check("a", calls.append, "m", "s")])
+        self.assertEqual(calls, [])
+        self.assertEqual(results, [{"title": "a", "status": "cancelled", "details": "Scan cancelled"}])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                   SCANNER_RESULT_REUSE_WINDOW=3600)
+class ResultCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.checks = [Check(name, _sleeper(0), "m", "s") for name in "ABCDE"]
+
+    def test_only_reusable_results_are_stored(self):
+        results = [
+            {"status": "pass"},
+            {"status": "fail"},
+            {"status": "error"},
+            {"status": "cancelled"},
+            {"status": "warn", "transient": True},
+        ]
+        store_results("Example.com", self.checks, results)
+        reused = get_reusable("https://example.com/", self.checks)
+        self.assertEqual({name: entry["result"] for name, entry in reused.items()},
+                         {"A": {"status": "pass"}, "B": {"status": "fail"}})
+
+    def test_version_bump_invalidates(self):
+        store_results("example.com", self.checks[:1], [{"status": "pass"}])
+        bumped = dataclasses.replace(self.checks[0], version=2)
+        self.assertEqual(get_reusable("example.com", [bumped]), {})
+
+    @override_settings(SCANNER_RESULT_REUSE_WINDOW=0)
+    def test_disabled_window(self):
+        store_results("example.com", self.checks[:1], [{"status": "pass"}])
+        self.assertEqual(get_reusable("example.com", self.checks[:1]), {})
+
+    def test_swallowed_failures_mark_the_result_transient(self):
+        def swallows(domain):
+            record_failure()
+            return {"title": "Headers", "status": "fail"}
+
+        with timing_scope():
+            results = ThreadPoolCheckExecutor().run("example.com", [Check("Headers", swallows, "m", "s")])
+        self.assertTrue(results[0]["transient"])
+
+    def test_probe_failures_are_charged_to_every_reader(self):
+        calls = []
+
+        def flaky(domain):
+            calls.append(domain)
+            record_failure()
+            return {}
+
+        PROBES["test-flaky"] = (flaky, ())
+        self.addCleanup(PROBES.pop, "test-flaky")
+        with scan_scope(), timing_scope():
+            for name in ("first", "second"):
+                with measure(name) as timing:
+                    get_probe("test-flaky", "example.com")
+                self.assertTrue(timing.failures, name)
+        self.assertEqual(calls, ["example.com"])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                   SCANNER_MAX_RESUMES=2)
+class ReaperTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.firm = _firm()
+
+    def _running(self, state, resume_count=0):
+        scan = ScanResult.objects.create(
+            firm=self.firm, domain="example.com", status="RUNNING", resume_count=resume_count,
+            lease_expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        scan.raw_data = {"results": {}, "pending": [], **state}
+        scan.save()
+        return scan
+
+    def _reap(self, heavy_state="PENDING"):
+        with mock.patch.object(tasks.resume_scan, "delay") as resume, \
+                mock.patch.object(tasks, "AsyncResult", return_value=mock.Mock(state=heavy_state)):
+            tasks.reap_expired_scans()
+        return resume
+
+    def test_expired_lease_is_resumed_once(self):
+        scan = self._running({"plan": ["A"]})
+        resume = self._reap()
+        resume.assert_called_once_with(scan.pk)
+        scan.refresh_from_db()
+        self.assertEqual(scan.resume_count, 1)
+        self.assertGreater(scan.lease_expires_at, timezone.now())
+        # The lease moved, so the next pass leaves it alone
+        self._reap().assert_not_called()
+
+    def test_fails_after_max_resumes(self):
+        scan = self._running({"plan": ["A"]}, resume_count=2)
+        self._reap().assert_not_called()
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, "FAILED")
+        self.assertIn("Worker lost 3 times", scan.scan_log)
+
+    def test_queued_heavy_checks_get_a_new_lease_not_a_resume(self):
+        state = {"plan": ["A", "H"], "results": {"A": {"status": "pass"}}, "pending": ["H"], "light_done": True,
+                 "heavy_tasks": {"H": "task-1"}, "heavy_queued_at": {"H": time.time()}}
+        scan = self._running(state)
+        self._reap().assert_not_called()
+        scan.refresh_from_db()
+        self.assertEqual(scan.resume_count, 0)
+        self.assertGreater(scan.lease_expires_at, timezone.now())
+
+    def test_lost_or_overdue_heavy_checks_are_resumed(self):
+        state = {"plan": ["A", "H"], "results": {"A": {"status": "pass"}}, "pending": ["H"], "light_done": True,
+                 "heavy_tasks": {"H": "task-1"}, "heavy_queued_at": {"H": time.time()}}
+        scan = self._running(state)
+        self._reap(heavy_state="FAILURE").assert_called_once_with(scan.pk)
+
+        state["heavy_queued_at"] = {"H": time.time() - 5 * 3600}
+        scan = self._running(state)
+        self._reap().assert_called_once_with(scan.pk)
+
+    def test_resume_runs_only_unfinished_checks(self):
+        calls = []
+
+        def check(domain):
+            calls.append(domain)
+            return {"title": "C", "status": "pass"}
+
+        checks = {name: Check(name, check, "m", "s") for name in "ABC"}
+        scan = self._running({"plan": list(checks), "results": {"A": {"title": "A", "status": "fail"}}})
+        save_checkpoint(scan.scan_id, "B", {"title": "B", "status": "warn"})
+        with mock.patch.dict(tasks.CHECKS_BY_NAME, checks), mock.patch.object(tasks, "queue_report_build"):
+            tasks.resume_scan.apply(args=[scan.pk])
+
+        self.assertEqual(calls, ["example.com"])
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, "COMPLETED")
+        self.assertEqual({name: r["status"] for name, r in scan.raw_data["checks"].items()},
+                         {"A": "fail", "B": "warn", "C": "pass"})
+        self.assertIn("[RESUMED] Worker lost; 2/3 checks already done", scan.scan_log)
+
+    def test_resume_without_a_plan_fails(self):
+        scan = self._running({})
+        tasks.resume_scan.apply(args=[scan.pk])
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, "FAILED")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                   SCANNER_BATCH_CONCURRENCY=2)
+class BatchDispatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.firm = _firm()
+        self.scans = ScanResult.objects.bulk_create([
+            ScanResult(firm=self.firm, domain=f"d{i}.com", status="PENDING", batch_id="b1", scan_id=f"s{i}")
+            for i in range(4)
+        ])
+
+    def test_fills_free_slots_oldest_first(self):
+        with mock.patch.object(tasks.run_batch_scan, "delay") as run:
+            self.assertEqual(fill_batch_slots(), 2)
+            # Already dispatched scans keep their slots; nothing else fits
+            self.assertEqual(fill_batch_slots(), 0)
+        self.assertEqual([c.args[0] for c in run.call_args_list], [s.pk for s in self.scans[:2]])
+
+    def test_finished_scan_hands_its_slot_to_the_next(self):
+        with mock.patch.object(tasks.run_batch_scan, "delay") as run:
+            fill_batch_slots()
+            ScanResult.objects.filter(pk=self.scans[0].pk).update(status="COMPLETED")
+            batch_scan_finished(ScanResult.objects.get(pk=self.scans[0].pk))
+        self.assertEqual(run.call_args_list[-1].args, (self.scans[2].pk,))
+
+    def test_stale_dispatch_is_skipped_and_frees_the_slot(self):
+        with mock.patch.object(tasks.run_batch_scan, "delay") as run:
+            fill_batch_slots()
+            ScanResult.objects.filter(pk=self.scans[0].pk).update(status="CANCELLED")
+            self.assertEqual(tasks.run_batch_scan(self.scans[0].pk), "Skipped")
+        self.assertEqual(run.call_args_list[-1].args, (self.scans[2].pk,))
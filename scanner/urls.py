@@ -17,6 +17,10 @@ urlpatterns = [
     path('run/', views.StartScanView.as_view(), name='run_scan'),
     path('run/modal/', views.RunScanModalView.as_view(), name='run_modal'),
 
+    # Bulk portfolio scan
+    path('bulk/', views.BulkScanView.as_view(), name='bulk_scan'),
+    path('bulk/<str:batch_id>/', views.batch_status, name='batch_status'),
+
     # --- ALL SCAN DETAILS AND ACTIONS UPDATED TO STRING-BASED ID ---
     
     # Details & Progress
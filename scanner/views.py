@@ -1,5 +1,6 @@
 # scanner/views.py
 from django.views.generic import ListView, DetailView, View, TemplateView
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse, reverse_lazy
 from django_htmx.http import HttpResponseLocation, HttpResponseClientRefresh
@@ -21,6 +22,9 @@ from weasyprint import HTML
 
 from core.mixins import FirmRequiredMixin
 from .models import ScanResult
+from .batch import DOMAIN_RE, batch_progress, batch_scan_finished, parse_domains, start_batch
+from .cancellation import request_cancel
+from .progress import apply_live_progress
 from .tasks import run_compliance_scan
 from reports.models import ComplianceReport, ReportVerification
 from reports.utils import calculate_sha256_bytes
@@ -47,13 +51,8 @@ class ScanDashboardView(LoginRequiredMixin, ListView):
     context_object_name = 'scans'
     
     def get_queryset(self):
-        #return ScanResult.objects.filter(
-        #    firm=self.request.user.firm
-        #).select_related('firm').order_by('-scan_date')
-        return ScanResult.objects.filter(
-            firm=self.request.user.firm
-             ).select_related('firm', 'manual_audit').order_by('-scan_date')
-        
+        return ScanResult.objects.for_firm(self.request.user.firm).listing().with_report().order_by('-scan_date')
+
         
 
 # === SCAN LIST ===
@@ -63,15 +62,16 @@ class ScanListView(FirmRequiredMixin, ListView):
     context_object_name = 'scans'
 
     def get_queryset(self):
-        return ScanResult.objects.filter(firm=self.request.user.firm).order_by('-scan_date')
+        return ScanResult.objects.for_firm(self.request.user.firm).listing().order_by('-scan_date')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        qs = self.get_queryset()
-        latest_scan = qs.first()
+        scans = self.object_list = list(self.object_list)  # one query for the table and the stat cards
+        latest_scan = scans[0] if scans else None
+        context[self.context_object_name] = scans
         context['latest_scan_obj'] = latest_scan
         context['latest_grade'] = latest_scan.grade if latest_scan else None
-        context['total_scans'] = qs.count()
+        context['total_scans'] = len(scans)
         return context
 
 # === RUN SCAN MODAL (HTMX) ===
@@ -92,7 +92,7 @@ class StartScanView(LoginRequiredMixin, View):
             messages.error(request, "Please enter a domain.")
             return redirect('scanner:scan_list')
 
-        if not re.match(r'^[a-z0-9-]+(\.[a-z0-9-]+)*\.[a-z]{2,}$', domain):
+        if not DOMAIN_RE.match(domain):
             messages.error(request, "Invalid domain format.")
             return redirect('scanner:scan_list')
 
@@ -118,11 +118,48 @@ class StartScanView(LoginRequiredMixin, View):
             return HttpResponseLocation(reverse('scanner:scan_status', args=[scan.scan_id]))
         return redirect('scanner:dashboard')
 
+# === BULK PORTFOLIO SCAN (API) ===
+@method_decorator(ratelimit(key='user', rate='10/h', method='POST', block=True), name='dispatch')
+class BulkScanView(FirmRequiredMixin, View):
+    """
+    POST `domains` (one per line or comma separated) and/or a CSV `file`.
+    Returns the batch id; progress is on ws/batch/<batch_id>/ and bulk/<batch_id>/.
+    """
+
+    def post(self, request):
+        domains, invalid = parse_domains(request.POST.get('domains', '').splitlines())
+        upload = request.FILES.get('file')
+        if upload:
+            csv_domains, csv_invalid = parse_domains(upload.read().decode('utf-8-sig', errors='ignore').splitlines())
+            domains = list(dict.fromkeys(domains + csv_domains))
+            invalid += csv_invalid
+        max_domains = getattr(settings, 'SCANNER_BATCH_MAX_DOMAINS', 5000)
+        if not domains:
+            return JsonResponse({'error': 'No valid domains', 'invalid': invalid[:100]}, status=400)
+        if len(domains) > max_domains:
+            return JsonResponse({'error': f'At most {max_domains} domains per batch'}, status=400)
+
+        batch_id = start_batch(request.user.firm, domains, user=request.user)
+        return JsonResponse({
+            'batch_id': batch_id,
+            'queued': len(domains),
+            'invalid': invalid[:100],
+            'status_url': reverse('scanner:batch_status', args=[batch_id]),
+        }, status=202)
+
+
+@login_required
+def batch_status(request, batch_id):
+    if not ScanResult.objects.filter(batch_id=batch_id, firm=request.user.firm).exists():
+        return JsonResponse({'error': 'Batch not found'}, status=404)
+    return JsonResponse(batch_progress(batch_id))
+
 # === SCAN STATUS ===
 
 # We define this as a function to match your urls.py 'views.scan_status'
 def scan_status(request, scan_id):
     scan = get_object_or_404(ScanResult, scan_id=scan_id, firm=request.user.firm)
+    apply_live_progress(scan)
     context = {
         'scan': scan,
         'active_statuses': ("RUNNING", "PENDING")
@@ -132,6 +169,7 @@ def scan_status(request, scan_id):
 # === HTMX PARTIAL: Progress Update ===
 def scan_status_partial(request, scan_id):
     scan = get_object_or_404(ScanResult, scan_id=scan_id, firm=request.user.firm)
+    apply_live_progress(scan)
     context = {
         'scan': scan,
         'active_statuses': ('RUNNING', 'PENDING'),
@@ -152,9 +190,13 @@ class CancelScanView(LoginRequiredMixin, View):
     def post(self, request, scan_id):
         scan = get_object_or_404(ScanResult, scan_id=scan_id, firm=request.user.firm)
         if scan.status in ['PENDING', 'RUNNING']:
+            # The worker polls this flag and stops the scan within seconds
+            request_cancel(scan.scan_id)
             scan.status = 'CANCELLED'
             scan.scan_log = (scan.scan_log or "") + '\n[Cancelled by user]'
-            scan.save()
+            scan.save(update_fields=['status', 'scan_log'])
+            # A scan only waiting on queued work gives its batch slot back now
+            batch_scan_finished(scan)
         return HttpResponseClientRefresh()
 
 # === RETRY SCAN ===